@@ -0,0 +1,290 @@
+"""
+ABC-SMC calibration of the climate ABM against the 1970-2024 historical dataset
+
+The ABM has no notion of economic activity growth, so the backcast is compared
+on emission intensity: the historical CO2 per tonne of material use, indexed
+to 1970, against the ABM's total emissions indexed to its first year. Both
+fall only through decarbonisation, which is what the adoption parameters
+control.
+
+Approximate Bayesian Computation with sequential Monte Carlo (Beaumont et al.
+2009 / Toni et al. 2009) is used: each generation proposes particles from the
+previous weighted population, runs backcasts in parallel batches, and keeps
+those whose distance to the observed summary statistics is below an
+adaptively shrinking tolerance. Backcasts are abandoned as soon as their
+running distance exceeds the tolerance.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from scipy import stats
+
+from enhanced_climate_abm import ClimateModel
+
+
+# Uniform priors (low, high) around the hand-picked values
+DEFAULT_PRIORS = {
+    'env_awareness_alpha': (0.5, 6.0),   # hand-picked: 2
+    'env_awareness_beta': (1.0, 12.0),   # hand-picked: 5
+    'adoption_scale': (0.005, 0.3),      # hand-picked: 0.1
+    'temp_sensitivity': (0.0, 6e-6),     # hand-picked: 0.0000015
+}
+
+# Years at which the emission-intensity index is compared
+CHECKPOINT_YEARS = (1975, 1980, 1985, 1990, 1995, 2000, 2005, 2010, 2015, 2020, 2024)
+
+
+def load_intensity_index(data_file="data/civilization_dynamics_1970_2024.csv"):
+    """Historical CO2-per-material intensity, indexed to the first year"""
+    df = pd.read_csv(data_file).sort_values('year')
+    intensity = (df['co2_emissions_gt'] / df['material_use_gt']).values
+    return df['year'].values, intensity / intensity[0]
+
+
+def iterate_backcast(params, start_year=1970, end_year=2024, n_households=200, n_firms=20,
+                     initial_temperature=0.3, seed=None):
+    """
+    Run an ABM backcast, yielding (year, emission-intensity index) after each step
+
+    initial_temperature is the approximate 1970 warming above pre-industrial.
+    """
+    if seed is not None:
+        np.random.seed(seed)
+
+    model = ClimateModel(
+        n_households=n_households,
+        n_firms=n_firms,
+        awareness_alpha=params.get('env_awareness_alpha', 2),
+        awareness_beta=params.get('env_awareness_beta', 5),
+        temp_sensitivity=params.get('temp_sensitivity', 0.0000015),
+        social_influence=params.get('social_influence', 0.3),
+        base_carbon_price=params.get('base_carbon_price', 30),
+        adoption_scale=params.get('adoption_scale', 0.1),
+        start_year=start_year,
+        initial_temperature=initial_temperature
+    )
+    initial_emissions = sum(a.annual_emissions for a in model.agents)
+
+    base_renewable_cost = 100
+    fossil_cost = 80
+    learning_rate = params.get('learning_rate', 0.15)
+    current_adoption = 0
+
+    while model.year < end_year:
+        renewable_cost = base_renewable_cost * (2 ** (np.log2(max(current_adoption + 1, 1)) * -learning_rate))
+        new_adoptions, _, _, total_emissions = model.step(renewable_cost, fossil_cost)
+        current_adoption += new_adoptions
+        yield model.year, total_emissions / initial_emissions
+
+
+def _simulate_distance(args):
+    """
+    Worker: run one backcast and return its distance to the observations
+
+    The distance is the RMS error over checkpoint years; since it can only grow
+    as checkpoints accumulate, the run stops as soon as it exceeds epsilon.
+    """
+    params, observed, epsilon, backcast_kwargs, seed = args
+    n_checkpoints = len(observed)
+    sq_error = 0.0
+    limit = np.inf if epsilon is None else epsilon ** 2 * n_checkpoints
+
+    for year, index in iterate_backcast(params, seed=seed, **backcast_kwargs):
+        if year in observed:
+            sq_error += (index - observed[year]) ** 2
+            if sq_error > limit:
+                return np.inf
+    return np.sqrt(sq_error / n_checkpoints)
+
+
+class ABCSMCCalibrator:
+    def __init__(self, priors=DEFAULT_PRIORS, data_file="data/civilization_dynamics_1970_2024.csv",
+                 n_particles=200, checkpoint_years=CHECKPOINT_YEARS, n_households=200, n_firms=20,
+                 quantile=0.5, seed=0):
+        """
+        priors: dict of parameter name -> (low, high) uniform prior bounds
+        n_particles: accepted particles per generation
+        quantile: next tolerance is this quantile of the current accepted distances
+        n_households, n_firms: backcast population (smaller is faster but noisier)
+        """
+        self.names = list(priors)
+        self.bounds = np.array([priors[n] for n in self.names], dtype=float)
+        self.n_particles = n_particles
+        self.quantile = quantile
+        self.rng = np.random.default_rng(seed)
+        self.backcast_kwargs = {'n_households': n_households, 'n_firms': n_firms}
+
+        years, index = load_intensity_index(data_file)
+        self.history_years = years
+        self.history_index = index
+        self.backcast_kwargs.update(start_year=int(years[0]), end_year=int(years[-1]))
+        self.observed = {int(y): i for y, i in zip(years, index) if int(y) in checkpoint_years}
+
+    # Particles live on the unit cube so parameters of very different scales
+    # (e.g. temp_sensitivity ~1e-6) share a well-conditioned perturbation kernel
+
+    def _to_params(self, u):
+        return self.bounds[:, 0] + u * (self.bounds[:, 1] - self.bounds[:, 0])
+
+    def _prior_density(self, u):
+        """Uniform prior density on the unit cube; zero outside it"""
+        return np.all((u >= 0) & (u <= 1), axis=-1).astype(float)
+
+    def _sample_prior(self, n):
+        return self.rng.uniform(0, 1, size=(n, len(self.names)))
+
+    def _evaluate(self, executor, particles, epsilon):
+        """Evaluate a batch of particles in parallel"""
+        seeds = self.rng.integers(0, 2 ** 31 - 1, size=len(particles))
+        tasks = [(dict(zip(self.names, theta)), self.observed, epsilon, self.backcast_kwargs, int(s))
+                 for theta, s in zip(self._to_params(particles), seeds)]
+        return np.array(list(executor.map(_simulate_distance, tasks, chunksize=max(1, len(tasks) // 32))))
+
+    def run(self, max_generations=6, min_acceptance_rate=0.02, batch_size=None, n_workers=None,
+            max_proposals=None, verbose=True):
+        """
+        Run ABC-SMC and return the final weighted posterior sample
+
+        min_acceptance_rate: stop after a generation accepting fewer of its simulations than this
+        max_proposals: proposals allowed per generation, including those rejected by the
+                       prior without simulating (default n_particles / min_acceptance_rate);
+                       a generation that cannot fill within it is discarded and the run
+                       ends with the previous one
+        Returns a dict with 'names', 'samples' (n_particles, n_params), 'weights',
+        'distances', 'epsilons' and 'acceptance_rates' per generation.
+        """
+        batch_size = batch_size or self.n_particles
+        max_proposals = max_proposals or int(np.ceil(self.n_particles / min_acceptance_rate))
+        epsilons, acceptance_rates = [], []
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # Generation 0: rejection from the prior with no tolerance
+            particles = self._sample_prior(self.n_particles)
+            distances = self._evaluate(executor, particles, None)
+            weights = np.full(self.n_particles, 1.0 / self.n_particles)
+            epsilons.append(np.inf)
+            acceptance_rates.append(1.0)
+
+            for generation in range(1, max_generations + 1):
+                epsilon = np.quantile(distances, self.quantile)
+                if epsilon >= epsilons[-1]:
+                    # Ties at the quantile (e.g. many runs with no adoption) stall the schedule
+                    if verbose:
+                        print(f"Tolerance stopped shrinking at {epsilon:.4f}; stopping")
+                    break
+
+                # Gaussian perturbation kernel with twice the weighted covariance
+                cov = 2 * np.atleast_2d(np.cov(particles.T, aweights=weights))
+                cov += 1e-12 * np.eye(len(self.names))
+                kernel = stats.multivariate_normal(mean=np.zeros(len(self.names)), cov=cov)
+
+                accepted, accepted_distances = [], []
+                n_simulated = n_proposed = 0
+                while len(accepted) < self.n_particles and n_proposed < max_proposals:
+                    n_proposed += batch_size
+                    parents = self.rng.choice(len(particles), size=batch_size, p=weights)
+                    proposals = particles[parents] + self.rng.multivariate_normal(
+                        np.zeros(len(self.names)), cov, size=batch_size)
+
+                    # Proposals outside the prior are rejected without simulating
+                    proposals = proposals[self._prior_density(proposals) > 0]
+                    if len(proposals) == 0:
+                        continue
+
+                    batch_distances = self._evaluate(executor, proposals, epsilon)
+                    n_simulated += len(proposals)
+                    keep = batch_distances <= epsilon
+                    accepted.extend(proposals[keep])
+                    accepted_distances.extend(batch_distances[keep])
+
+                if len(accepted) < self.n_particles:
+                    # Near-zero acceptance at this tolerance, or proposals keep leaving the prior
+                    if verbose:
+                        print(f"Generation {generation}: only {len(accepted)} of {self.n_particles} particles "
+                              f"accepted at epsilon = {epsilon:.4f} after {n_proposed} proposals "
+                              f"({n_simulated} simulations); keeping generation {generation - 1}")
+                    break
+
+                new_particles = np.array(accepted[:self.n_particles])
+                new_distances = np.array(accepted_distances[:self.n_particles])
+
+                # Importance weights: prior / mixture of perturbation kernels
+                diffs = new_particles[:, None, :] - particles[None, :, :]
+                kernel_density = kernel.pdf(diffs.reshape(-1, len(self.names))).reshape(len(new_particles), -1)
+                new_weights = self._prior_density(new_particles) / (kernel_density @ weights)
+                new_weights /= new_weights.sum()
+
+                particles, distances, weights = new_particles, new_distances, new_weights
+                acceptance_rate = self.n_particles / n_simulated
+                epsilons.append(epsilon)
+                acceptance_rates.append(acceptance_rate)
+
+                if verbose:
+                    print(f"Generation {generation}: epsilon = {epsilon:.4f}, "
+                          f"acceptance = {acceptance_rate:.3f}, simulations = {n_simulated}")
+
+                if acceptance_rate < min_acceptance_rate:
+                    break
+
+        self.result = {
+            'names': self.names,
+            'samples': self._to_params(particles),
+            'weights': weights,
+            'distances': distances,
+            'epsilons': np.array(epsilons),
+            'acceptance_rates': np.array(acceptance_rates)
+        }
+        return self.result
+
+    def posterior_summary(self, result=None):
+        """Print weighted posterior means and 90% credible intervals"""
+        result = result or self.result
+        samples, weights = result['samples'], result['weights']
+
+        print("\nPosterior summary (weighted mean, 90% credible interval)")
+        summary = {}
+        for i, name in enumerate(result['names']):
+            order = np.argsort(samples[:, i])
+            cdf = np.cumsum(weights[order])
+            low, high = samples[order, i][np.searchsorted(cdf, [0.05, 0.95])]
+            mean = np.sum(weights * samples[:, i])
+            summary[name] = (mean, low, high)
+            print(f"  {name:<22} {mean:.4g}  [{low:.4g}, {high:.4g}]")
+        return summary
+
+    def plot_posterior(self, result=None, n_backcasts=30):
+        """Plot posterior marginals and a fan of posterior backcasts against the data"""
+        result = result or self.result
+        samples, weights = result['samples'], result['weights']
+        n_params = len(result['names'])
+
+        fig, axes = plt.subplots(1, n_params + 1, figsize=(5 * (n_params + 1), 4))
+
+        for i, name in enumerate(result['names']):
+            axes[i].hist(samples[:, i], bins=30, weights=weights, alpha=0.7)
+            axes[i].set_xlim(self.bounds[i])
+            axes[i].set_title(f'Posterior: {name}')
+
+        ax = axes[-1]
+        draws = self.rng.choice(len(samples), size=n_backcasts, p=weights)
+        for i in draws:
+            years, index = zip(*iterate_backcast(dict(zip(result['names'], samples[i])), **self.backcast_kwargs))
+            ax.plot(years, index, color='steelblue', alpha=0.2)
+        ax.plot(self.history_years, self.history_index, 'k-', linewidth=2, label='Historical')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('Emission intensity (1970 = 1)')
+        ax.set_title('Posterior Backcasts')
+        ax.legend()
+
+        plt.tight_layout()
+        plt.show()
+
+
+if __name__ == "__main__":
+    calibrator = ABCSMCCalibrator(n_particles=200)
+    result = calibrator.run(max_generations=5)
+    calibrator.posterior_summary()
+    calibrator.plot_posterior()
@@ -0,0 +1,329 @@
+"""
+Gaussian-process emulator of the climate ABM
+
+Trains a surrogate on a Latin-hypercube design of ABM runs so that "what-if"
+queries over the PARAM_DISTRIBUTIONS inputs return trajectories of temperature,
+adoption, emissions and carbon price (with predictive uncertainty) in
+milliseconds rather than the seconds-to-minutes of a fresh simulation.
+
+Trajectories are compressed with PCA and a Gaussian process with an ARD
+squared-exponential kernel is fitted to the principal-component scores.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+from climate_abm_with_uncertainties import PARAM_DISTRIBUTIONS, run_single_simulation
+
+
+OUTPUT_NAMES = ('temperatures', 'adoption_rates', 'emissions', 'carbon_prices')
+
+
+def design_parameters(n_runs, param_distributions=PARAM_DISTRIBUTIONS, width=2.0, seed=None):
+    """
+    Latin-hypercube design covering mean ± width * std of each parameter
+
+    Returns (names, X) where X has shape (n_runs, n_params).
+    """
+    names = list(param_distributions)
+    means = np.array([param_distributions[n][0] for n in names], dtype=float)
+    stds = np.array([param_distributions[n][1] for n in names], dtype=float)
+
+    sampler = qmc.LatinHypercube(d=len(names), seed=seed)
+    unit = sampler.random(n_runs)
+    X = qmc.scale(unit, means - width * stds, means + width * stds)
+
+    return names, X
+
+
+def _run_design_point(args):
+    """Worker wrapper so design points can be farmed out to processes"""
+    names, x, years, n_households, n_firms, seed = args
+    params = dict(zip(names, x))
+    return run_single_simulation(params, years=years, n_households=n_households,
+                                 n_firms=n_firms, seed=seed)
+
+
+def run_design(names, X, years=30, n_households=1000, n_firms=100, n_workers=None, seed=0):
+    """
+    Run the ABM at every design point
+
+    Returns a dict mapping each output name to an (n_runs, years + 1) array.
+    """
+    tasks = [(names, x, years, n_households, n_firms, seed + i) for i, x in enumerate(X)]
+
+    if n_workers == 1:
+        runs = [_run_design_point(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            runs = list(executor.map(_run_design_point, tasks))
+
+    return {name: np.array([run[name] for run in runs]) for name in OUTPUT_NAMES}
+
+
+class ABMEmulator:
+    def __init__(self, variance_explained=0.999, max_components=20):
+        """
+        variance_explained: fraction of output variance kept by the PCA basis
+        max_components: upper bound on the number of principal components
+        """
+        self.variance_explained = variance_explained
+        self.max_components = max_components
+        self.is_fitted = False
+
+    def fit(self, names, X, outputs):
+        """
+        Fit the emulator to design inputs X (n_runs, n_params) and ABM outputs
+
+        outputs: dict of output name -> (n_runs, n_times) arrays, as returned by run_design
+        """
+        self.param_names = list(names)
+        self.output_names = [name for name in OUTPUT_NAMES if name in outputs]
+        self.n_times = outputs[self.output_names[0]].shape[1]
+
+        # Standardise inputs
+        X = np.asarray(X, dtype=float)
+        self.x_mean = X.mean(axis=0)
+        self.x_std = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        Xs = (X - self.x_mean) / self.x_std
+
+        # Standardise every (output, time) column and stack them side by side
+        Y = np.hstack([outputs[name] for name in self.output_names]).astype(float)
+        self.y_mean = Y.mean(axis=0)
+        self.y_std = np.where(Y.std(axis=0) > 1e-12, Y.std(axis=0), 1.0)
+        Ys = (Y - self.y_mean) / self.y_std
+
+        # PCA compression of the trajectories
+        _, s, Vt = np.linalg.svd(Ys, full_matrices=False)
+        explained = np.cumsum(s ** 2) / np.sum(s ** 2)
+        n_components = int(np.searchsorted(explained, self.variance_explained) + 1)
+        n_components = min(n_components, self.max_components, len(s))
+        self.components = Vt[:n_components]
+        scores = Ys @ self.components.T
+
+        # Variance left out of the PCA basis is added back as a per-column floor
+        residual = Ys - scores @ self.components
+        self.residual_var = residual.var(axis=0)
+
+        self.score_std = scores.std(axis=0)
+        self.score_std[self.score_std == 0] = 1.0
+        self.train_scores = scores / self.score_std
+        self.train_x = Xs
+
+        self._optimise_hyperparameters()
+        self._precompute()
+        self.is_fitted = True
+        return self
+
+    def _kernel(self, A, B, lengthscales):
+        """ARD squared-exponential kernel with unit signal variance"""
+        A = A / lengthscales
+        B = B / lengthscales
+        sq = np.sum(A ** 2, axis=1)[:, None] + np.sum(B ** 2, axis=1)[None, :] - 2 * A @ B.T
+        return np.exp(-0.5 * np.maximum(sq, 0))
+
+    def _negative_log_marginal_likelihood(self, log_theta):
+        """Summed over the (independent, shared-kernel) PCA score outputs"""
+        lengthscales = np.exp(log_theta[:-1])
+        noise = np.exp(log_theta[-1])
+        n, m = self.train_scores.shape
+
+        K = self._kernel(self.train_x, self.train_x, lengthscales) + (noise + 1e-8) * np.eye(n)
+        try:
+            factor = cho_factor(K, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e10
+
+        alpha = cho_solve(factor, self.train_scores)
+        log_det = 2 * np.sum(np.log(np.diag(factor[0])))
+        return 0.5 * np.sum(self.train_scores * alpha) + 0.5 * m * log_det + 0.5 * n * m * np.log(2 * np.pi)
+
+    def _optimise_hyperparameters(self):
+        """Maximise the marginal likelihood from a few starting points"""
+        d = self.train_x.shape[1]
+        best = None
+        for start_scale in (0.5, 1.0, 2.0):
+            x0 = np.concatenate([np.full(d, np.log(start_scale)), [np.log(1e-2)]])
+            bounds = [(np.log(0.05), np.log(50.0))] * d + [(np.log(1e-6), np.log(1.0))]
+            result = minimize(self._negative_log_marginal_likelihood, x0, method='L-BFGS-B', bounds=bounds)
+            if best is None or result.fun < best.fun:
+                best = result
+
+        self.lengthscales = np.exp(best.x[:-1])
+        self.noise = np.exp(best.x[-1])
+
+    def _precompute(self):
+        """Cache the Cholesky factor and weights so queries are a couple of matmuls"""
+        n = len(self.train_x)
+        K = self._kernel(self.train_x, self.train_x, self.lengthscales) + (self.noise + 1e-8) * np.eye(n)
+        self._factor = cho_factor(K, lower=True)
+        self._alpha = cho_solve(self._factor, self.train_scores)
+
+    def _as_matrix(self, params):
+        """Accept a parameter dict, a list of dicts or an (n, n_params) array"""
+        if isinstance(params, dict):
+            params = [params]
+        if len(params) and isinstance(params[0], dict):
+            defaults = {name: PARAM_DISTRIBUTIONS.get(name, (m, 0))[0]
+                        for name, m in zip(self.param_names, self.x_mean)}
+            params = [[p.get(name, defaults[name]) for name in self.param_names] for p in params]
+        return np.atleast_2d(np.asarray(params, dtype=float))
+
+    def predict(self, params, return_std=True):
+        """
+        Emulate ABM trajectories
+
+        Returns (mean, std) dicts mapping output names to (n_queries, n_times) arrays,
+        or just the mean dict if return_std is False.
+        """
+        if not self.is_fitted:
+            raise RuntimeError("Emulator has not been fitted or loaded")
+
+        Xq = (self._as_matrix(params) - self.x_mean) / self.x_std
+        k = self._kernel(Xq, self.train_x, self.lengthscales)
+
+        scores = (k @ self._alpha) * self.score_std
+        Ys = scores @ self.components
+        Y = Ys * self.y_std + self.y_mean
+        mean = self._split(Y)
+
+        if not return_std:
+            return mean
+
+        v = cho_solve(self._factor, k.T)
+        score_var = np.maximum(1.0 + self.noise - np.sum(k * v.T, axis=1), 0)
+        # Every score shares the kernel, so variance maps back through the squared PCA loadings
+        column_var = score_var[:, None] * ((self.score_std ** 2) @ (self.components ** 2))[None, :]
+        Y_std = np.sqrt(column_var + self.residual_var) * self.y_std
+        return mean, self._split(Y_std)
+
+    def _split(self, Y):
+        """Split stacked columns back into one array per output"""
+        return {name: Y[:, i * self.n_times:(i + 1) * self.n_times]
+                for i, name in enumerate(self.output_names)}
+
+    def save(self, path):
+        """Save the fitted emulator to a .npz file"""
+        if not self.is_fitted:
+            raise RuntimeError("Nothing to save: emulator has not been fitted")
+
+        np.savez_compressed(
+            path,
+            param_names=np.array(self.param_names),
+            output_names=np.array(self.output_names),
+            n_times=self.n_times,
+            x_mean=self.x_mean, x_std=self.x_std,
+            y_mean=self.y_mean, y_std=self.y_std,
+            components=self.components,
+            residual_var=self.residual_var,
+            score_std=self.score_std,
+            train_scores=self.train_scores,
+            train_x=self.train_x,
+            lengthscales=self.lengthscales,
+            noise=self.noise,
+            variance_explained=self.variance_explained,
+            max_components=self.max_components
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load an emulator previously written with save()"""
+        with np.load(path) as data:
+            emulator = cls(variance_explained=float(data['variance_explained']),
+                           max_components=int(data['max_components']))
+            emulator.param_names = [str(n) for n in data['param_names']]
+            emulator.output_names = [str(n) for n in data['output_names']]
+            emulator.n_times = int(data['n_times'])
+            for key in ('x_mean', 'x_std', 'y_mean', 'y_std', 'components', 'residual_var',
+                        'score_std', 'train_scores', 'train_x', 'lengthscales'):
+                setattr(emulator, key, data[key])
+            emulator.noise = float(data['noise'])
+
+        emulator._precompute()
+        emulator.is_fitted = True
+        return emulator
+
+    def validation_report(self, X_test, outputs_test, verbose=True):
+        """
+        Compare the emulator against held-out ABM runs
+
+        Reports RMSE, normalised RMSE, R² and the coverage of the 95% predictive
+        interval for each output.
+        """
+        mean, std = self.predict(X_test)
+        report = {}
+
+        for name in self.output_names:
+            observed = outputs_test[name]
+            error = mean[name] - observed
+            rmse = np.sqrt(np.mean(error ** 2))
+            spread = np.ptp(observed) if np.ptp(observed) > 0 else 1.0
+            ss_tot = np.sum((observed - observed.mean(axis=0)) ** 2)
+            r2 = 1 - np.sum(error ** 2) / ss_tot if ss_tot > 0 else 0
+            coverage = np.mean(np.abs(error) <= 1.96 * std[name])
+            report[name] = {'rmse': rmse, 'nrmse': rmse / spread, 'r2': r2, 'coverage_95': coverage}
+
+        if verbose:
+            print(f"\nEmulator validation against {len(X_test)} held-out ABM runs")
+            print(f"{'Output':<16}{'RMSE':>12}{'NRMSE':>10}{'R²':>8}{'95% cov':>10}")
+            for name, stats in report.items():
+                print(f"{name:<16}{stats['rmse']:>12.4g}{stats['nrmse']:>10.3f}"
+                      f"{stats['r2']:>8.3f}{stats['coverage_95']:>10.2f}")
+
+        return report
+
+
+def plot_emulator_query(emulator, params, start_year=2024):
+    """Plot emulated trajectories with 95% predictive bands for one parameter set"""
+    mean, std = emulator.predict(params)
+    years_list = np.arange(start_year, start_year + emulator.n_times)
+
+    titles = {
+        'temperatures': 'Temperature Above Pre-industrial (°C)',
+        'adoption_rates': 'Renewable Energy Adoption Rate',
+        'emissions': 'Annual Emissions (tonnes CO2)',
+        'carbon_prices': 'Carbon Price ($)'
+    }
+
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    for ax, name in zip(axes.flatten(), emulator.output_names):
+        ax.fill_between(years_list, mean[name][0] - 1.96 * std[name][0],
+                        mean[name][0] + 1.96 * std[name][0], alpha=0.2)
+        ax.plot(years_list, mean[name][0])
+        ax.set_ylabel(titles[name])
+        ax.set_xlabel('Year')
+        ax.set_title(f'Emulated {titles[name].split(" (")[0]}')
+
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    # Train on a modest design; the population is reduced to keep the demo quick
+    years = 30
+    names, X = design_parameters(60, seed=1)
+    print(f"Running {len(X)} ABM design points...")
+    outputs = run_design(names, X, years=years, n_households=300, n_firms=30)
+
+    train, test = slice(0, 48), slice(48, None)
+    emulator = ABMEmulator().fit(names, X[train], {k: v[train] for k, v in outputs.items()})
+    print(f"Emulator uses {len(emulator.components)} principal components, "
+          f"lengthscales = {np.round(emulator.lengthscales, 2)}")
+
+    emulator.validation_report(X[test], {k: v[test] for k, v in outputs.items()})
+
+    emulator.save('abm_emulator.npz')
+    emulator = ABMEmulator.load('abm_emulator.npz')
+
+    query = {'learning_rate': 0.2, 'social_influence': 0.4}
+    start = time.perf_counter()
+    emulator.predict(query)
+    print(f"\nSingle emulator query took {1000 * (time.perf_counter() - start):.2f} ms")
+
+    plot_emulator_query(emulator, query)
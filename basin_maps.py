@@ -0,0 +1,213 @@
+"""
+Basin-of-attraction maps for the attractor models
+
+Instead of always starting from the 2024 point, a dense grid of initial
+(emissions, materials, growth) states is integrated and each end state is
+labelled two ways:
+
+- by attractor: which stable equilibrium the trajectory was captured by, or
+  not captured (cycle, chaos or slow transient) / diverged, and
+- by transition zone (transition_zones.TRANSITION_ZONES) of the end state, or
+  of the state at a chosen horizon (e.g. 2050).
+
+The grid is split into chunks integrated in parallel processes. Within a
+chunk all active members are advanced together with the vectorised ensemble
+integrator in short segments; after each segment members within capture_tol
+(in scaled units) of a stable equilibrium are retired, so settled
+trajectories stop costing anything.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap
+
+from attractor_ensemble import integrate_ensemble
+from continuation import find_equilibria
+from transition_zones import TRANSITION_ZONES, OUTSIDE, zone_index, zone_names
+
+
+NOT_CAPTURED = -1
+DIVERGED = -2
+AXIS_LABELS = ('CO2e Emissions (GT/yr)', 'Material Use (GT/yr)', 'Growth (%/yr)')
+
+
+def stable_equilibria(system):
+    """Equilibria of the system whose Jacobian eigenvalues all have negative real part"""
+    return [state for state in find_equilibria(system)
+            if np.all(np.linalg.eigvals(system.jacobian(state, 0)).real < 0)]
+
+
+def _basin_chunk(args):
+    """Worker: integrate one chunk of initial states with early retirement of captured members"""
+    start, system, initial_states, attractors, t_max, segment, capture_tol, divergence_limit, horizon = args
+    scales = np.array([system.emissions_scale, system.materials_scale, system.growth_scale])
+
+    states = initial_states.copy()
+    horizon_states = None
+    labels = np.full(len(states), NOT_CAPTURED, dtype=int)
+    capture_time = np.full(len(states), np.nan)
+    active = np.arange(len(states))
+    t = 0.0
+    while len(active) and t < t_max:
+        step = min(segment, t_max - t)
+        if horizon is not None and t < horizon:
+            step = min(step, horizon - t)  # Land a segment boundary on the horizon
+        trajectories, _ = integrate_ensemble(system, states[active], t_span=step, n_points=2)
+        current = trajectories[:, -1]
+        t += step
+
+        diverged = ~np.all(np.isfinite(current), axis=1) | np.any(np.abs(current) > divergence_limit * scales,
+                                                                   axis=1)
+        captured = np.zeros(len(active), dtype=bool)
+        if len(attractors):
+            distances = np.linalg.norm((current[:, None, :] - attractors[None, :, :]) / scales, axis=2)
+            nearest = np.argmin(distances, axis=1)
+            captured = (distances[np.arange(len(active)), nearest] < capture_tol) & ~diverged
+            labels[active[captured]] = nearest[captured]
+            capture_time[active[captured]] = t
+
+        labels[active[diverged]] = DIVERGED
+        states[active] = current
+        if horizon is not None and horizon_states is None and t >= horizon:
+            horizon_states = states.copy()  # Members retired earlier sit at their attractor
+        active = active[~(captured | diverged)]
+
+    return start, labels, states, capture_time, states if horizon_states is None else horizon_states
+
+
+def basin_map(system, emissions, materials, growth, t_max=300.0, segment=10.0, capture_tol=0.01,
+              chunk_size=2000, n_workers=None, divergence_limit=1e3, zone_horizon=None):
+    """
+    Integrate a grid of initial states and label where each one ends up
+
+    emissions, materials, growth: grid values for each state variable (a scalar
+                                  holds that variable fixed, giving a 2-D map)
+    t_max: longest integration time for members that are not captured earlier
+    segment: time between capture checks
+    capture_tol: scaled distance to a stable equilibrium that counts as captured
+    zone_horizon: time (years) at which states are assigned to transition zones
+                  (default: the end state); must not exceed t_max
+
+    Returns a dict with the grid axes, attractor labels (index into attractors,
+    NOT_CAPTURED or DIVERGED), zone labels (index into zone_names or OUTSIDE),
+    end states and capture times, all shaped (n_emissions, n_materials, n_growth).
+    """
+    if zone_horizon is not None and zone_horizon > t_max:
+        raise ValueError(f"zone_horizon ({zone_horizon}) is beyond t_max ({t_max}); "
+                         "the integration would stop before reaching it")
+    axes = [np.atleast_1d(np.asarray(values, dtype=float)) for values in (emissions, materials, growth)]
+    grid = np.meshgrid(*axes, indexing='ij')
+    shape = grid[0].shape
+    initial_states = np.column_stack([g.ravel() for g in grid])
+
+    attractors = np.array(stable_equilibria(system)).reshape(-1, 3)
+    tasks = [(start, system, initial_states[start:start + chunk_size], attractors, t_max, segment, capture_tol,
+              divergence_limit, zone_horizon) for start in range(0, len(initial_states), chunk_size)]
+
+    labels = np.empty(len(initial_states), dtype=int)
+    end_states = np.empty_like(initial_states)
+    capture_time = np.empty(len(initial_states))
+    zone_states = np.empty_like(initial_states)
+    if n_workers == 1 or len(tasks) == 1:
+        results = [_basin_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_basin_chunk, tasks))
+    for start, chunk_labels, chunk_states, chunk_times, chunk_zone_states in results:
+        stop = start + len(chunk_labels)
+        labels[start:stop] = chunk_labels
+        end_states[start:stop] = chunk_states
+        capture_time[start:stop] = chunk_times
+        zone_states[start:stop] = chunk_zone_states
+
+    return {
+        'axes': axes,
+        'attractors': attractors,
+        'labels': labels.reshape(shape),
+        'zones': zone_index(zone_states).reshape(shape),
+        'zone_names': zone_names(),
+        'zone_horizon': zone_horizon,
+        'end_states': end_states.reshape(shape + (3,)),
+        'capture_time': capture_time.reshape(shape),
+    }
+
+
+def plot_basin_map(result, title='Basins of Attraction', start_year=2024):
+    """
+    Attractor basins and end-state zones over the two varying grid axes
+
+    3-D grids are shown at the middle slice of the third axis.
+    """
+    axes = result['axes']
+    varying = [i for i, values in enumerate(axes) if len(values) > 1][:2]
+    if len(varying) < 2:
+        raise ValueError("Need at least two varying axes to plot a basin map")
+    fixed = [i for i in range(3) if i not in varying][0]
+    index = [slice(None)] * 3
+    index[fixed] = len(axes[fixed]) // 2
+    index = tuple(index)
+
+    x_axis, y_axis = varying
+    extent = (axes[x_axis][0], axes[x_axis][-1], axes[y_axis][0], axes[y_axis][-1])
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+
+    # Attractor labels: equilibria first, then not captured and diverged
+    n_attractors = len(result['attractors'])
+    labels = result['labels'][index]
+    codes = np.where(labels >= 0, labels, np.where(labels == NOT_CAPTURED, n_attractors, n_attractors + 1))
+    names = [f'Equilibrium ({a[0]:.0f}, {a[1]:.0f}, {a[2]:.1f})' for a in result['attractors']]
+    names += ['Not captured', 'Diverged']
+    colors = ListedColormap(list(plt.cm.tab10.colors[:n_attractors]) + ['lightgrey', 'black'])
+    image = ax1.imshow(codes.T, origin='lower', extent=extent, aspect='auto', cmap=colors,
+                       vmin=-0.5, vmax=len(names) - 0.5, interpolation='nearest')
+    colorbar = fig.colorbar(image, ax=ax1, ticks=range(len(names)))
+    colorbar.ax.set_yticklabels(names)
+    ax1.set_title(title)
+
+    zone_labels = result['zones'][index]
+    names = result['zone_names'] + ['Outside zones']
+    codes = np.where(zone_labels == OUTSIDE, len(names) - 1, zone_labels)
+    colors = ListedColormap([zone.color for zone in TRANSITION_ZONES] + ['lightgrey'])
+    image = ax2.imshow(codes.T, origin='lower', extent=extent, aspect='auto', cmap=colors,
+                       vmin=-0.5, vmax=len(names) - 0.5, interpolation='nearest')
+    colorbar = fig.colorbar(image, ax=ax2, ticks=range(len(names)))
+    colorbar.ax.set_yticklabels(names)
+    horizon = result['zone_horizon']
+    ax2.set_title('Transition Zone of End State' if horizon is None else
+                  f'Transition Zone in {start_year + horizon:g}')
+
+    for ax in (ax1, ax2):
+        ax.scatter([[50.0, 106.0, 2.5][x_axis]], [[50.0, 106.0, 2.5][y_axis]], color='red', marker='*', s=150,
+                   label='2024')
+        ax.set_xlabel(AXIS_LABELS[x_axis])
+        ax.set_ylabel(AXIS_LABELS[y_axis])
+        ax.legend(loc='upper left')
+    fig.suptitle(f'{AXIS_LABELS[fixed]} fixed at {axes[fixed][index[fixed]]:g}')
+
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    from empirical_civilization_attractor import EmpiricalCivilizationAttractor
+    from transition_attractor import RealisticTransitionAttractor
+
+    # Empirical parameters: starting emissions/materials around 2024, growth held at 2.5 %/yr
+    system = EmpiricalCivilizationAttractor()
+    start = time.perf_counter()
+    result = basin_map(system, np.linspace(-100, 150, 120), np.linspace(-150, 250, 120), 2.5, t_max=400,
+                       zone_horizon=26)
+    print(f"Empirical basins: {result['labels'].size} trajectories in {time.perf_counter() - start:.1f} s; "
+          f"median capture time {np.nanmedian(result['capture_time']):.0f} years")
+    plot_basin_map(result, 'Empirical Attractor: Basins')
+
+    # Transition model below its Hopf point (rho_H ~ 24.7): two stable equilibria
+    system = RealisticTransitionAttractor(sigma=10.0, rho=20.0, beta=8 / 3)
+    start = time.perf_counter()
+    result = basin_map(system, np.linspace(-150, 150, 150), np.linspace(-300, 300, 150), 2.5, t_max=100,
+                       segment=2)
+    print(f"Transition basins: {result['labels'].size} trajectories in {time.perf_counter() - start:.1f} s")
+    plot_basin_map(result, 'Transition Attractor (σ=10, ρ=20, β=8/3): Basins')
@@ -0,0 +1,83 @@
+"""
+Vectorised bootstrap helpers for small regression problems
+
+Thousands of resampled least-squares fits are solved at once: the resampled
+design matrices are stacked into a (n_boot, n, k) array and their normal
+equations X'X b = X'y are solved in a single batched np.linalg.solve call,
+instead of one np.linalg.lstsq per replicate in a Python loop.
+
+Two resampling schemes are provided:
+
+- moving-block bootstrap: rows are resampled in contiguous blocks, which
+  keeps the serial correlation of annual time series within each block, and
+- residual bootstrap: the design is held fixed and the residuals of the
+  original fit are resampled onto the fitted values.
+"""
+
+import numpy as np
+
+
+METHODS = ('block', 'residual')
+
+
+def moving_block_indices(n, n_boot, block_length, rng):
+    """(n_boot, n) row indices built from randomly placed contiguous blocks"""
+    block_length = max(1, min(block_length, n))
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n - block_length + 1, size=(n_boot, n_blocks))
+    indices = starts[:, :, None] + np.arange(block_length)
+    return indices.reshape(n_boot, -1)[:, :n]
+
+
+def resample_indices(n, n_boot, method='block', block_length=5, rng=None):
+    """Row indices for each replicate: moving blocks, or iid draws for residual resampling"""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    rng = np.random.default_rng() if rng is None else rng
+    if method == 'block':
+        return moving_block_indices(n, n_boot, block_length, rng)
+    return rng.integers(0, n, size=(n_boot, n))
+
+
+def resample(X, y, coefficients, indices, method='block'):
+    """
+    Stacked replicate data sets
+
+    X: (n, k) design; y: (n,) response; coefficients: (k,) original fit
+    Returns (n_boot, n, k) designs and (n_boot, n) responses.
+    """
+    if method == 'block':
+        return X[indices], y[indices]
+    fitted = X @ coefficients
+    residuals = y - fitted
+    return np.broadcast_to(X, indices.shape + X.shape[1:]), fitted + residuals[indices]
+
+
+def batched_least_squares(X, y):
+    """
+    Least-squares coefficients of many problems in one solve
+
+    X: (b, n, k) stacked designs; y: (b, n) responses
+    Returns (b, k) coefficients (NaN rows where X'X is singular).
+    """
+    XtX = np.einsum('bnk,bnl->bkl', X, X)
+    Xty = np.einsum('bnk,bn->bk', X, y)
+    singular = np.abs(np.linalg.det(XtX)) <= 1e-12 * np.prod(np.einsum('bkk->bk', XtX), axis=1)
+    XtX[singular] = np.eye(X.shape[2])
+    coefficients = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+    coefficients[singular] = np.nan
+    return coefficients
+
+
+def batched_r_squared(y, predicted):
+    """R² of each replicate: y, predicted are (b, n)"""
+    ss_res = np.sum((y - predicted) ** 2, axis=1)
+    ss_tot = np.sum((y - y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(ss_tot > 0, 1 - ss_res / ss_tot, 0.0)
+
+
+def percentile_interval(samples, confidence=0.95):
+    """(low, high) percentile interval of bootstrap samples, ignoring NaN replicates"""
+    tail = 100 * (1 - confidence) / 2
+    return tuple(np.nanpercentile(samples, [tail, 100 - tail], axis=0))
@@ -0,0 +1,210 @@
+"""
+Carbon-price schedule optimisation with CMA-ES over parallel ABM ensembles
+
+Searches for the cheapest carbon-price path that keeps the ensemble P90 peak
+temperature below a target. A schedule is parametrised by prices at a few
+equally spaced knots, linearly interpolated to annual values. Each candidate
+is evaluated on an ensemble of ABM runs that share seeds with every other
+candidate (common random numbers), so differences between candidates reflect
+the schedule rather than sampling noise. All (candidate, member) runs of a
+CMA-ES generation are farmed out to one process pool.
+
+Temperatures come from the impulse-response climate module, which makes them
+independent of the (small) ABM population size used for speed.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from climate_module import ImpulseResponseClimate
+from enhanced_climate_abm import ClimateModel
+
+
+def schedule_from_knots(knots, years):
+    """Annual prices by linear interpolation between equally spaced knots (negative prices clipped)"""
+    knots = np.maximum(np.asarray(knots, dtype=float), 0)
+    return np.interp(np.arange(years), np.linspace(0, years - 1, len(knots)), knots)
+
+
+def simulate_schedule(args):
+    """
+    Worker: run one ensemble member under a price schedule
+
+    Returns (peak temperature, annual temperatures, annual emissions).
+    """
+    prices, seed, n_households, n_firms, sensitivity_spread = args
+    np.random.seed(seed)
+    climate = ImpulseResponseClimate(n_ensemble=1, sensitivity_spread=sensitivity_spread, seed=seed)
+    model = ClimateModel(n_households=n_households, n_firms=n_firms, climate=climate,
+                         carbon_price_schedule=prices, trace_adoptions=False)
+
+    base_renewable_cost = 100
+    fossil_cost = 80
+    current_adoption = 0
+    temperatures, emissions = [], []
+    for year in range(len(prices)):
+        renewable_cost = base_renewable_cost * (2 ** (np.log2(max(current_adoption + 1, 1)) * -0.15))
+        new_adoptions, _, temperature, total_emissions = model.step(renewable_cost, fossil_cost)
+        current_adoption += new_adoptions
+        temperatures.append(temperature)
+        emissions.append(total_emissions * model.emissions_to_gtco2)
+
+    return max(temperatures), np.array(temperatures), np.array(emissions)
+
+
+class CarbonPriceOptimizer:
+    def __init__(self, years=30, n_knots=5, target_temperature=1.25, quantile=90, n_members=16,
+                 n_households=200, n_firms=20, sensitivity_spread=0.2, discount_rate=0.03,
+                 max_price=400, penalty=1e4, seed=0):
+        """
+        target_temperature: limit on the ensemble percentile of peak temperature (°C; the ABM starts at 1.0)
+        quantile: the percentile that must stay below target (90 = P90)
+        n_members: ensemble size; member seeds are shared by every candidate
+        discount_rate: used to discount prices in the schedule cost
+        penalty: cost added per °C the percentile exceeds the target
+        """
+        self.years = years
+        self.n_knots = n_knots
+        self.target_temperature = target_temperature
+        self.quantile = quantile
+        self.max_price = max_price
+        self.penalty = penalty
+        self.member_seeds = list(np.random.default_rng(seed).integers(0, 2 ** 31 - 1, size=n_members))
+        self.member_kwargs = (n_households, n_firms, sensitivity_spread)
+        self.discount = (1 + discount_rate) ** -np.arange(years)
+        self.rng = np.random.default_rng(seed + 1)
+
+    def schedule_cost(self, prices):
+        """Discounted sum of annual carbon prices"""
+        return float(np.sum(self.discount * prices))
+
+    def evaluate(self, executor, candidates):
+        """
+        Evaluate candidate knot vectors on the common-random-number ensemble
+
+        Returns (objective, cost, temperature percentile) arrays over candidates.
+        """
+        schedules = [schedule_from_knots(np.clip(c, 0, self.max_price), self.years) for c in candidates]
+        tasks = [(prices, seed, *self.member_kwargs) for prices in schedules for seed in self.member_seeds]
+        peaks = np.array([r[0] for r in executor.map(simulate_schedule, tasks, chunksize=4)])
+        peaks = peaks.reshape(len(candidates), len(self.member_seeds))
+
+        percentile = np.percentile(peaks, self.quantile, axis=1)
+        cost = np.array([self.schedule_cost(prices) for prices in schedules])
+        objective = cost + self.penalty * np.maximum(percentile - self.target_temperature, 0)
+        return objective, cost, percentile
+
+    def optimise(self, n_generations=30, population_size=None, initial_price=50.0, initial_sigma=40.0,
+                 n_workers=None, verbose=True):
+        """
+        Minimise the schedule objective with CMA-ES (Hansen 2016 defaults)
+
+        Returns a dict with the best schedule, its knots, cost and temperature
+        percentile, and the per-generation convergence history.
+        """
+        n = self.n_knots
+        lam = population_size or 4 + int(3 * np.log(n))
+        mu = lam // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        weights /= weights.sum()
+        mu_eff = 1 / np.sum(weights ** 2)
+
+        # Strategy parameters
+        c_sigma = (mu_eff + 2) / (n + mu_eff + 5)
+        d_sigma = 1 + 2 * max(0, np.sqrt((mu_eff - 1) / (n + 1)) - 1) + c_sigma
+        c_c = (4 + mu_eff / n) / (n + 4 + 2 * mu_eff / n)
+        c_1 = 2 / ((n + 1.3) ** 2 + mu_eff)
+        c_mu = min(1 - c_1, 2 * (mu_eff - 2 + 1 / mu_eff) / ((n + 2) ** 2 + mu_eff))
+        chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        mean = np.full(n, initial_price, dtype=float)
+        sigma = initial_sigma
+        C = np.eye(n)
+        p_sigma = np.zeros(n)
+        p_c = np.zeros(n)
+
+        best = {'objective': np.inf}
+        history = {'best_objective': [], 'mean_objective': [], 'sigma': [], 'best_percentile': []}
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for generation in range(n_generations):
+                eigenvalues, B = np.linalg.eigh(C)
+                D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+                z = self.rng.standard_normal((lam, n))
+                y = z @ np.diag(D) @ B.T
+                candidates = mean + sigma * y
+
+                objective, cost, percentile = self.evaluate(executor, candidates)
+                order = np.argsort(objective)
+
+                if objective[order[0]] < best['objective']:
+                    knots = np.clip(candidates[order[0]], 0, self.max_price)
+                    best = {'objective': objective[order[0]], 'knots': knots,
+                            'schedule': schedule_from_knots(knots, self.years),
+                            'cost': cost[order[0]], 'percentile': percentile[order[0]]}
+
+                history['best_objective'].append(objective[order[0]])
+                history['mean_objective'].append(np.mean(objective))
+                history['sigma'].append(sigma)
+                history['best_percentile'].append(percentile[order[0]])
+
+                if verbose:
+                    print(f"Generation {generation + 1}: best objective = {objective[order[0]]:.1f}, "
+                          f"P{self.quantile} peak = {percentile[order[0]]:.3f} °C, sigma = {sigma:.2f}")
+
+                # Recombination
+                y_w = weights @ y[order[:mu]]
+                mean = mean + sigma * y_w
+
+                # Step-size and covariance evolution paths
+                C_inv_sqrt = B @ np.diag(1 / D) @ B.T
+                p_sigma = (1 - c_sigma) * p_sigma + np.sqrt(c_sigma * (2 - c_sigma) * mu_eff) * C_inv_sqrt @ y_w
+                h_sigma = (np.linalg.norm(p_sigma) / np.sqrt(1 - (1 - c_sigma) ** (2 * (generation + 1)))
+                           < (1.4 + 2 / (n + 1)) * chi_n)
+                p_c = (1 - c_c) * p_c + h_sigma * np.sqrt(c_c * (2 - c_c) * mu_eff) * y_w
+
+                rank_mu = (y[order[:mu]].T * weights) @ y[order[:mu]]
+                C = ((1 - c_1 - c_mu) * C + c_1 * (np.outer(p_c, p_c) + (1 - h_sigma) * c_c * (2 - c_c) * C)
+                     + c_mu * rank_mu)
+                C = (C + C.T) / 2
+                sigma *= np.exp((c_sigma / d_sigma) * (np.linalg.norm(p_sigma) / chi_n - 1))
+
+        best['history'] = {key: np.array(value) for key, value in history.items()}
+        return best
+
+
+def plot_optimisation(result, start_year=2024):
+    """Plot the best schedule and the convergence history"""
+    history = result['history']
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+    years_list = np.arange(start_year, start_year + len(result['schedule']))
+    ax1.plot(years_list, result['schedule'], 'b-', linewidth=2)
+    ax1.set_xlabel('Year')
+    ax1.set_ylabel('Carbon Price ($)')
+    ax1.set_title(f'Cheapest Schedule (cost {result["cost"]:.0f}, '
+                  f'P90 peak {result["percentile"]:.2f} °C)')
+    ax1.grid(True)
+
+    generations = np.arange(1, len(history['best_objective']) + 1)
+    ax2.plot(generations, history['best_objective'], label='Best in generation')
+    ax2.plot(generations, history['mean_objective'], label='Generation mean')
+    ax2.set_yscale('log')
+    ax2.set_xlabel('Generation')
+    ax2.set_ylabel('Objective')
+    ax2.set_title('CMA-ES Convergence')
+    ax2.legend()
+    ax2.grid(True)
+
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    optimizer = CarbonPriceOptimizer(years=30, n_members=16)
+    result = optimizer.optimise(n_generations=25)
+    print(f"\nBest schedule knots: {np.round(result['knots'], 1)}")
+    print(f"Cost: {result['cost']:.1f}, P90 peak temperature: {result['percentile']:.3f} °C")
+    plot_optimisation(result)
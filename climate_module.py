@@ -0,0 +1,149 @@
+"""
+Batched impulse-response carbon-cycle and temperature module
+
+A simple FaIR/AR5-style impulse-response climate: emitted CO2 is split across
+four carbon pools with different decay timescales, the resulting concentration
+drives a logarithmic radiative forcing, and temperature responds through a
+fast and a slow thermal box. Every quantity is an array over ensemble members,
+so thousands of climate states advance with one array operation per step.
+
+The module plugs into ClimateModel via its `climate` argument, replacing the
+linear cumulative-emissions temperature rule.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+GTCO2_PER_PPM = 7.81  # GtCO2 per ppm of atmospheric CO2
+
+# AR5 impulse-response parameters (Myhre et al. 2013, Joos et al. 2013)
+DEFAULT_POOL_FRACTIONS = (0.2173, 0.2240, 0.2824, 0.2763)
+DEFAULT_POOL_TIMESCALES = (1e6, 394.4, 36.54, 4.304)    # years
+DEFAULT_THERMAL_SENSITIVITIES = (0.33, 0.41)           # K per W/m2
+DEFAULT_THERMAL_TIMESCALES = (239.0, 4.1)              # years
+
+
+class ImpulseResponseClimate:
+    def __init__(self, n_ensemble=1, initial_temperature=1.0, co2_concentration=420.0,
+                 pool_fractions=DEFAULT_POOL_FRACTIONS, pool_timescales=DEFAULT_POOL_TIMESCALES,
+                 thermal_sensitivities=DEFAULT_THERMAL_SENSITIVITIES,
+                 thermal_timescales=DEFAULT_THERMAL_TIMESCALES,
+                 sensitivity_spread=0.0, carbon_cycle_spread=0.0, timestep=1.0, seed=None):
+        """
+        n_ensemble: number of climate states updated together
+        initial_temperature: warming above pre-industrial at the start (°C)
+        co2_concentration: atmospheric CO2 at the start (ppm)
+        sensitivity_spread: lognormal sigma of a per-member scaling of the thermal sensitivities
+        carbon_cycle_spread: lognormal sigma of a per-member scaling of the pool timescales
+        timestep: years per step
+
+        Warming present at the start is held by a constant background forcing, so
+        temperature changes are driven by emissions after the start year.
+        """
+        rng = np.random.default_rng(seed)
+        self.n_ensemble = n_ensemble
+        self.timestep = timestep
+        self.initial_concentration = co2_concentration
+
+        sensitivity_scale = rng.lognormal(0, sensitivity_spread, size=(n_ensemble, 1)) if sensitivity_spread else 1.0
+        cycle_scale = rng.lognormal(0, carbon_cycle_spread, size=(n_ensemble, 1)) if carbon_cycle_spread else 1.0
+
+        self.pool_fractions = np.asarray(pool_fractions, dtype=float)
+        self.q = np.asarray(thermal_sensitivities, dtype=float) * sensitivity_scale * np.ones((n_ensemble, 1))
+        pool_timescales = np.asarray(pool_timescales, dtype=float) * cycle_scale * np.ones((n_ensemble, 1))
+        thermal_timescales = np.asarray(thermal_timescales, dtype=float)
+
+        # Per-step decay factors are constant, so precompute them once
+        self.pool_decay = np.exp(-timestep / pool_timescales)
+        self.thermal_decay = np.exp(-timestep / thermal_timescales)
+
+        # State: excess CO2 in each pool (GtCO2) and temperature of each thermal box
+        self.pools = np.zeros((n_ensemble, len(self.pool_fractions)))
+        self.background_forcing = initial_temperature / self.q.sum(axis=1)
+        self.thermal = self.q * self.background_forcing[:, None]
+
+    @property
+    def temperature(self):
+        return self.thermal.sum(axis=1)
+
+    @property
+    def concentration(self):
+        return self.initial_concentration + self.pools.sum(axis=1) / GTCO2_PER_PPM
+
+    def forcing(self):
+        """Radiative forcing (W/m2): background plus CO2 added since the start"""
+        return self.background_forcing + 5.35 * np.log(self.concentration / self.initial_concentration)
+
+    def step(self, emissions):
+        """
+        Advance one timestep
+
+        emissions: GtCO2/yr, a scalar or an (n_ensemble,) array
+        Returns the (n_ensemble,) temperature array.
+        """
+        emissions = np.broadcast_to(np.asarray(emissions, dtype=float), (self.n_ensemble,))
+        self.pools = self.pools * self.pool_decay + np.outer(emissions * self.timestep, self.pool_fractions)
+
+        forcing = self.forcing()
+        self.thermal = self.thermal * self.thermal_decay + self.q * forcing[:, None] * (1 - self.thermal_decay)
+        return self.temperature
+
+    def run(self, emissions_pathways):
+        """
+        Integrate emissions pathways of shape (n_steps,) or (n_ensemble, n_steps)
+
+        Returns an (n_ensemble, n_steps + 1) temperature array including the start.
+        """
+        emissions_pathways = np.asarray(emissions_pathways, dtype=float)
+        if emissions_pathways.ndim == 1:
+            emissions_pathways = np.broadcast_to(emissions_pathways, (self.n_ensemble, len(emissions_pathways)))
+
+        temperatures = [self.temperature]
+        for step in range(emissions_pathways.shape[1]):
+            temperatures.append(self.step(emissions_pathways[:, step]))
+        return np.array(temperatures).T
+
+
+if __name__ == "__main__":
+    from enhanced_climate_abm import ClimateModel
+
+    # One ABM run drives a 1000-member climate ensemble
+    climate = ImpulseResponseClimate(n_ensemble=1000, sensitivity_spread=0.25, carbon_cycle_spread=0.15, seed=0)
+    model = ClimateModel(n_households=1000, n_firms=100, climate=climate)
+
+    years = 30
+    temperature_ensemble = [climate.temperature]
+    base_renewable_cost = 100
+    fossil_cost = 80
+    for year in range(years):
+        current_adoption = sum(1 for a in model.agents if a.has_renewables)
+        renewable_cost = base_renewable_cost * (2 ** (np.log2(max(current_adoption + 1, 1)) * -0.15))
+        model.step(renewable_cost, fossil_cost)
+        temperature_ensemble.append(model.temperature_ensemble)
+
+    temperature_ensemble = np.array(temperature_ensemble)
+    years_list = np.arange(2024, 2024 + years + 1)
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    ax1.fill_between(years_list, np.percentile(temperature_ensemble, 5, axis=1),
+                     np.percentile(temperature_ensemble, 95, axis=1), alpha=0.2, label='5-95%')
+    ax1.plot(years_list, np.median(temperature_ensemble, axis=1), label='Median')
+    ax1.set_ylabel('Temperature Above Pre-industrial (°C)')
+    ax1.set_xlabel('Year')
+    ax1.set_title('ABM Temperature with Climate Ensemble')
+    ax1.legend()
+
+    # Pure climate ensemble: constant vs linearly declining global emissions
+    pathways = np.vstack([np.full(years, 40.0), np.linspace(40, 0, years)])
+    for emissions, label in zip(pathways, ['Constant 40 GtCO2', 'Linear to net zero']):
+        ensemble = ImpulseResponseClimate(n_ensemble=1000, sensitivity_spread=0.25, seed=1).run(emissions)
+        ax2.fill_between(years_list, np.percentile(ensemble, 5, axis=0),
+                         np.percentile(ensemble, 95, axis=0), alpha=0.2)
+        ax2.plot(years_list, np.median(ensemble, axis=0), label=label)
+    ax2.set_xlabel('Year')
+    ax2.set_title('Impulse-Response Climate Ensemble')
+    ax2.legend()
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,372 @@
+"""
+Pseudo-arclength continuation of equilibria and bifurcation diagrams
+
+Tracks equilibria of EmpiricalCivilizationAttractor or
+RealisticTransitionAttractor as one of sigma, rho or beta varies, without
+integrating trajectories. Each step predicts along the branch tangent (the
+null vector of [df/dx | df/dp]) and corrects with Newton's method on the
+equilibrium equations plus the arclength constraint, so the branch can be
+followed round folds. States are scaled by the system's emissions, materials
+and growth scales, and the parameter by the width of the scanned range, so
+the arclength treats all coordinates comparably.
+
+Along each branch three test functions are monitored:
+
+- fold (LP): the parameter component of the tangent changes sign,
+- branch point (BP): det(df/dx) changes sign while the tangent does not turn,
+- Hopf (H): the bialternate product of eigenvalue sums prod_{i<j}(l_i + l_j)
+  changes sign with a complex pair crossing the imaginary axis.
+
+Bifurcation points are located by regula falsi on the arclength between the
+bracketing steps. Branches from different starting equilibria, and
+the two directions away from each, are independent and run in parallel.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import fsolve
+import matplotlib.pyplot as plt
+
+
+PARAMETERS = ('sigma', 'rho', 'beta')
+
+
+def _parameters(system, parameter, value):
+    params = {name: getattr(system, name) for name in PARAMETERS}
+    params[parameter] = value
+    return params
+
+
+def _rhs(system, parameter, state, value):
+    return system.ensemble_system_eqs(np.asarray(state, dtype=float)[None, :], 0,
+                                      **_parameters(system, parameter, value))[0]
+
+
+def _jacobian(system, parameter, state, value):
+    return system.ensemble_jacobian(np.asarray(state, dtype=float)[None, :], 0,
+                                    **_parameters(system, parameter, value))[0]
+
+
+def _parameter_derivative(system, parameter, state, value):
+    h = 1e-6 * (1 + abs(value))
+    return (_rhs(system, parameter, state, value + h) - _rhs(system, parameter, state, value - h)) / (2 * h)
+
+
+def hopf_test(eigenvalues):
+    """Bialternate-product test function prod_{i<j}(l_i + l_j); zero at Hopf points"""
+    n = len(eigenvalues)
+    return np.real(np.prod([eigenvalues[i] + eigenvalues[j] for i in range(n) for j in range(i + 1, n)]))
+
+
+def find_equilibria(system, guesses=None, tol=1e-8):
+    """
+    Distinct equilibria reached by Newton's method from the guesses
+
+    Default guesses: the origin and points at 1, 3 and 10 times the 2024 scales
+    in both emission/material directions.
+    """
+    scales = np.array([system.emissions_scale, system.materials_scale, system.growth_scale])
+    if guesses is None:
+        guesses = [np.zeros(3)] + [scales * (sign * a, sign * a, a) for a in (1, 3, 10) for sign in (1, -1)]
+
+    equilibria = []
+    for guess in guesses:
+        state = fsolve(system.system_eqs, guess, args=(0,), fprime=system.jacobian, full_output=True)[0]
+        if np.max(np.abs(system.system_eqs(state, 0))) > tol * (1 + np.max(np.abs(state))):
+            continue
+        if all(np.max(np.abs((state - other) / scales)) > 1e-6 for other in equilibria):
+            equilibria.append(state)
+    return equilibria
+
+
+class EquilibriumContinuation:
+    def __init__(self, system, parameter, value_range, ds=0.01, ds_min=1e-6, ds_max=0.05,
+                 max_steps=5000, newton_tol=1e-10, max_newton=10):
+        """
+        system: attractor providing ensemble_system_eqs, ensemble_jacobian and the three scales
+        parameter: 'sigma', 'rho' or 'beta'
+        value_range: (low, high); continuation stops when the parameter leaves it
+        ds, ds_min, ds_max: initial, minimum and maximum arclength step (scaled units)
+        """
+        if parameter not in PARAMETERS:
+            raise ValueError(f"parameter must be one of {PARAMETERS}")
+        self.system = system
+        self.parameter = parameter
+        self.value_range = value_range
+        self.ds = ds
+        self.ds_min = ds_min
+        self.ds_max = ds_max
+        self.max_steps = max_steps
+        self.newton_tol = newton_tol
+        self.max_newton = max_newton
+
+        self.state_scale = np.array([system.emissions_scale, system.materials_scale, system.growth_scale])
+        self.parameter_scale = value_range[1] - value_range[0]
+
+    # Scaled coordinates y = (state / state_scale, value / parameter_scale)
+    def _split(self, y):
+        return y[:3] * self.state_scale, y[3] * self.parameter_scale
+
+    def _residual(self, y):
+        state, value = self._split(y)
+        return _rhs(self.system, self.parameter, state, value) / self.state_scale
+
+    def _extended_jacobian(self, y):
+        """[dF/dv | dF/dq] in scaled coordinates, shape (3, 4)"""
+        state, value = self._split(y)
+        J = _jacobian(self.system, self.parameter, state, value)
+        f_p = _parameter_derivative(self.system, self.parameter, state, value)
+        return np.column_stack([J * self.state_scale[None, :] / self.state_scale[:, None],
+                                f_p * self.parameter_scale / self.state_scale])
+
+    def _tangent(self, y, previous=None):
+        _, _, vt = np.linalg.svd(self._extended_jacobian(y))
+        tangent = vt[-1]
+        if previous is not None and tangent @ previous < 0:
+            tangent = -tangent
+        return tangent
+
+    def _correct(self, y_pred, tangent):
+        """Newton on F(y) = 0 and tangent . (y - y_pred) = 0; returns (y, iterations) or (None, _)"""
+        y = y_pred.copy()
+        for iteration in range(1, self.max_newton + 1):
+            residual = np.append(self._residual(y), tangent @ (y - y_pred))
+            matrix = np.vstack([self._extended_jacobian(y), tangent])
+            try:
+                delta = np.linalg.solve(matrix, -residual)
+            except np.linalg.LinAlgError:
+                return None, iteration
+            y = y + delta
+            if np.max(np.abs(delta)) < self.newton_tol and np.max(np.abs(self._residual(y))) < self.newton_tol:
+                return y, iteration
+        return None, self.max_newton
+
+    def _point(self, y, tangent):
+        state, value = self._split(y)
+        J = _jacobian(self.system, self.parameter, state, value)
+        eigenvalues = np.linalg.eigvals(J)
+        return {'y': y, 'tangent': tangent, 'state': state, 'value': value, 'eigenvalues': eigenvalues,
+                'dq': tangent[3], 'det': np.linalg.det(J), 'hopf': hopf_test(eigenvalues)}
+
+    def _locate(self, a, b, test, max_iter=40, tol=1e-12):
+        """
+        Zero of a test function between branch points a and b
+
+        Illinois-type regula falsi on the arclength from a; each trial point is
+        corrected back onto the branch, which stays regular at folds.
+        """
+        s_a, s_b = 0.0, a['tangent'] @ (b['y'] - a['y'])
+        g_a, g_b = a[test], b[test]
+        point, side = b, 0
+        for _ in range(max_iter):
+            s = s_a - g_a * (s_b - s_a) / (g_b - g_a) if g_b != g_a else (s_a + s_b) / 2
+            y, _ = self._correct(a['y'] + s * a['tangent'], a['tangent'])
+            if y is None:
+                break
+            point = self._point(y, self._tangent(y, a['tangent']))
+            g = point[test]
+            if np.sign(g) == np.sign(g_a):
+                s_a, g_a = s, g
+                if side == -1:
+                    g_b /= 2
+                side = -1
+            else:
+                s_b, g_b = s, g
+                if side == 1:
+                    g_a /= 2
+                side = 1
+            if abs(s_b - s_a) < tol:
+                break
+        return {'value': point['value'], 'state': point['state'], 'eigenvalues': point['eigenvalues']}
+
+    def _detect(self, a, b):
+        """Bifurcation points between consecutive branch points a and b"""
+        found = []
+        if np.sign(a['dq']) != np.sign(b['dq']):
+            found.append({'type': 'LP', **self._locate(a, b, 'dq')})
+        elif np.sign(a['det']) != np.sign(b['det']):
+            found.append({'type': 'BP', **self._locate(a, b, 'det')})
+
+        if np.sign(a['hopf']) != np.sign(b['hopf']):
+            hopf = self._locate(a, b, 'hopf')
+            complex_pair = hopf['eigenvalues'][np.abs(hopf['eigenvalues'].imag) > 1e-8]
+            # Without a complex pair on the axis this is a neutral saddle, not a Hopf point
+            if len(complex_pair) and np.min(np.abs(complex_pair.real)) < 1e-3 * np.max(np.abs(complex_pair)):
+                hopf['frequency'] = float(np.max(np.abs(complex_pair.imag)))
+                found.append({'type': 'H', **hopf})
+        return found
+
+    def run(self, initial_state, initial_value=None, direction=1):
+        """
+        Follow the branch through an equilibrium in one direction of the parameter
+
+        Returns a branch dict: parameter, values (n,), states (n, 3), eigenvalues
+        (n, 3), stable (n,) and points, a list of detected bifurcations.
+        """
+        value = getattr(self.system, self.parameter) if initial_value is None else initial_value
+        state = fsolve(lambda s: _rhs(self.system, self.parameter, s, value), initial_state,
+                       fprime=lambda s: _jacobian(self.system, self.parameter, s, value))
+        y = np.append(state / self.state_scale, value / self.parameter_scale)
+
+        tangent = self._tangent(y)
+        if np.sign(tangent[3]) != np.sign(direction) and tangent[3] != 0:
+            tangent = -tangent
+        points = [self._point(y, tangent)]
+        bifurcations = []
+
+        ds = self.ds
+        low, high = self.value_range
+        for _ in range(self.max_steps):
+            y_new, iterations = self._correct(y + ds * tangent, tangent)
+            if y_new is None:
+                ds /= 2
+                if ds < self.ds_min:
+                    break
+                continue
+
+            tangent = self._tangent(y_new, tangent)
+            point = self._point(y_new, tangent)
+            bifurcations.extend(self._detect(points[-1], point))
+            points.append(point)
+            y = y_new
+
+            if not low <= point['value'] <= high:
+                bifurcations = [b for b in bifurcations if low <= b['value'] <= high]
+                break
+            if iterations <= 3:
+                ds = min(ds * 1.5, self.ds_max)
+
+        eigenvalues = np.array([p['eigenvalues'] for p in points])
+        return {
+            'parameter': self.parameter,
+            'values': np.array([p['value'] for p in points]),
+            'states': np.array([p['state'] for p in points]),
+            'eigenvalues': eigenvalues,
+            'stable': np.all(eigenvalues.real < 0, axis=1),
+            'points': bifurcations,
+        }
+
+
+def _continue_branch(args):
+    """Worker: one direction of one branch"""
+    system, parameter, value_range, state, direction, kwargs = args
+    return EquilibriumContinuation(system, parameter, value_range, **kwargs).run(state, direction=direction)
+
+
+def _join(backward, forward):
+    """Join the two half-branches from the same start into one, ordered along the branch"""
+    joined = {'parameter': forward['parameter'], 'points': backward['points'] + forward['points']}
+    for key in ('values', 'states', 'eigenvalues', 'stable'):
+        joined[key] = np.concatenate([backward[key][::-1], forward[key][1:]])
+    return joined
+
+
+def _on_branch(point, branch, scale, tol=1e-4):
+    """Whether a scaled (state, value) point lies on a branch polyline"""
+    path = np.column_stack([branch['states'], branch['values']]) / scale
+    start, end = path[:-1], path[1:]
+    segment = end - start
+    length = np.maximum(np.sum(segment ** 2, axis=1), 1e-300)
+    theta = np.clip(np.sum((point - start) * segment, axis=1) / length, 0, 1)
+    distances = np.linalg.norm(start + theta[:, None] * segment - point, axis=1)
+    return len(distances) > 0 and distances.min() < tol
+
+
+def bifurcation_diagram(system, parameter, value_range, initial_states=None, n_workers=None, **kwargs):
+    """
+    Continue every equilibrium of the system in both directions of a parameter
+
+    initial_states: starting guesses for the equilibria at the system's current
+                    parameter value (default: find_equilibria's guesses)
+    kwargs: passed to EquilibriumContinuation
+    Returns a list of branch dicts (see EquilibriumContinuation.run).
+    """
+    equilibria = find_equilibria(system, initial_states)
+    tasks = [(system, parameter, value_range, state, direction, kwargs)
+             for state in equilibria for direction in (-1, 1)]
+
+    if n_workers == 1:
+        halves = [_continue_branch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            halves = list(executor.map(_continue_branch, tasks))
+
+    # A branch can pass through another start equilibrium (e.g. both sides of a
+    # pitchfork); keep only the first copy
+    scale = np.append([system.emissions_scale, system.materials_scale, system.growth_scale],
+                      value_range[1] - value_range[0])
+    value = getattr(system, parameter)
+    branches = []
+    for i, state in enumerate(equilibria):
+        if any(_on_branch(np.append(state, value) / scale, branch, scale) for branch in branches):
+            continue
+        branches.append(_join(halves[2 * i], halves[2 * i + 1]))
+    return branches
+
+
+def plot_bifurcation_diagram(branches, variable=2, ax=None, title=None):
+    """
+    Plot branches against the continuation parameter
+
+    variable: state component on the y axis (0 emissions, 1 materials, 2 growth).
+    Stable equilibria are solid, unstable dashed; LP, BP and H points are marked.
+    """
+    labels = ['CO2e Emissions (GT/yr)', 'Material Use (GT/yr)', 'Growth (%/yr)']
+    markers = {'LP': ('s', 'red', 'Fold (LP)'), 'BP': ('D', 'purple', 'Branch point (BP)'),
+               'H': ('o', 'orange', 'Hopf (H)')}
+    show = ax is None
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(10, 6))
+
+    for branch in branches:
+        values, states, stable = branch['values'], branch['states'][:, variable], branch['stable']
+        # Split into runs of constant stability
+        breaks = np.flatnonzero(np.diff(stable.astype(int))) + 1
+        for segment in np.split(np.arange(len(values)), breaks):
+            # Overlap by one point so segments join up
+            segment = np.append(segment, segment[-1] + 1) if segment[-1] + 1 < len(values) else segment
+            ax.plot(values[segment], states[segment], 'b-' if stable[segment[0]] else 'b--', linewidth=1.5)
+
+    used = set()
+    for branch in branches:
+        for point in branch['points']:
+            marker, color, label = markers[point['type']]
+            ax.scatter(point['value'], point['state'][variable], marker=marker, color=color, s=60, zorder=3,
+                       label=None if point['type'] in used else label)
+            used.add(point['type'])
+
+    parameter = branches[0]['parameter'] if branches else ''
+    ax.set_xlabel({'sigma': 'σ', 'rho': 'ρ', 'beta': 'β'}.get(parameter, parameter))
+    ax.set_ylabel(labels[variable])
+    ax.set_title(title or f'Equilibrium Branches over {parameter}')
+    ax.plot([], [], 'b-', label='Stable')
+    ax.plot([], [], 'b--', label='Unstable')
+    ax.legend()
+    ax.grid(True)
+    if show:
+        plt.tight_layout()
+        plt.show()
+
+
+if __name__ == "__main__":
+    from empirical_civilization_attractor import EmpiricalCivilizationAttractor
+    from transition_attractor import RealisticTransitionAttractor
+
+    scans = [
+        ('Empirical: ρ', EmpiricalCivilizationAttractor(), 'rho', (0.0, 10.0)),
+        ('Empirical: σ at ρ = 30', EmpiricalCivilizationAttractor(sigma=5.0, rho=30.0), 'sigma', (0.5, 30.0)),
+        ('Transition: ρ at σ = 10', RealisticTransitionAttractor(sigma=10.0, rho=4.0, beta=0.7), 'rho',
+         (0.0, 30.0)),
+    ]
+
+    fig, axes = plt.subplots(1, len(scans), figsize=(18, 6))
+    for ax, (label, system, parameter, value_range) in zip(axes, scans):
+        branches = bifurcation_diagram(system, parameter, value_range)
+        for branch in branches:
+            for point in branch['points']:
+                print(f"{label}: {point['type']} at {parameter} = {point['value']:.4f}")
+        plot_bifurcation_diagram(branches, variable=0, ax=ax, title=label)
+
+    plt.tight_layout()
+    plt.show()
@@ -1,8 +1,15 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from scipy.integrate import odeint
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from mpl_toolkits.mplot3d import Axes3D
 
+from ode_integration import integrate_odeint, integrate_solve_ivp, format_solve_stats
+from trajectory_cache import TrajectoryCache
+from trajectory_rendering import gradient_line_3d, lttb_downsample
+
 
 class EmpiricalCivilizationAttractor:
     def __init__(self, sigma=0.021, rho=4.75, beta=0.7):
@@ -22,6 +29,9 @@ class EmpiricalCivilizationAttractor:
         self.materials_scale = 106.0  # GT/year
         self.growth_scale = 2.5       # %/year
 
+        # Solver statistics from the last generate_trajectory/solve call
+        self.solve_stats = None
+
     def system_eqs(self, state, t):
         """
         Define the empirically-grounded system of equations
@@ -42,8 +52,53 @@ class EmpiricalCivilizationAttractor:
 
         return [dx, dy, dz]
 
-    def generate_trajectory(self, initial_state=None, t_span=50, n_points=5000):
-        """Generate a trajectory through the phase space"""
+    def jacobian(self, state, t):
+        """Analytic Jacobian of system_eqs, d(dx, dy, dz)/d(x, y, z)"""
+        x, y, z = state
+        scale_factor = 1e-4  # As in system_eqs
+        return np.array([
+            [-self.sigma, self.sigma, 0.0],
+            [self.rho - z, -1.0, -x],
+            [scale_factor * y, scale_factor * x, -self.beta]
+        ])
+
+    def ensemble_jacobian(self, states, t, sigma, rho, beta):
+        """Batched jacobian: (n_members, 3, 3) for (n_members, 3) states"""
+        x, y, z = states.T
+        scale_factor = 1e-4
+        J = np.zeros((len(states), 3, 3))
+        J[:, 0, 0] = -sigma
+        J[:, 0, 1] = sigma
+        J[:, 1, 0] = rho - z
+        J[:, 1, 1] = -1.0
+        J[:, 1, 2] = -x
+        J[:, 2, 0] = scale_factor * y
+        J[:, 2, 1] = scale_factor * x
+        J[:, 2, 2] = -beta
+        return J
+
+    def ensemble_system_eqs(self, states, t, sigma, rho, beta):
+        """
+        Batched system_eqs for many members at once (see attractor_ensemble.py)
+
+        states: (n_members, 3) array; sigma, rho, beta: scalars or (n_members,) arrays
+        """
+        x, y, z = states.T
+        scale_factor = 1e-4  # As in system_eqs
+        return np.column_stack([
+            sigma * (y - x),
+            x * (rho - z) - y,
+            x * y * scale_factor - beta * z
+        ])
+
+    def generate_trajectory(self, initial_state=None, t_span=50, n_points=5000, method='odeint', cache=None):
+        """
+        Generate a trajectory through the phase space
+
+        method: 'odeint', or a solve_ivp method ('LSODA', 'Radau', 'BDF' for stiff
+                settings, 'DOP853', 'RK45'); solver statistics go to self.solve_stats
+        cache: optional trajectory_cache.TrajectoryCache consulted before integrating
+        """
         if initial_state is None:
             # Start from our current 2024 position
             initial_state = [
@@ -52,27 +107,52 @@ class EmpiricalCivilizationAttractor:
                 2.5     # Current growth rate %/year
             ]
 
+        if cache is not None:
+            key = cache.key(self, initial_state, t_span, n_points, method)
+            cached = cache.get(key)
+            if cached is not None:
+                trajectory, t, self.solve_stats = cached
+                return trajectory, t
+
         t = np.linspace(0, t_span, n_points)
-        trajectory = odeint(self.system_eqs, initial_state, t)
+        if method == 'odeint':
+            trajectory, self.solve_stats = integrate_odeint(self, initial_state, t)
+        else:
+            solution = self.solve(initial_state, t_span, method)
+            trajectory = solution.sol(t).T
 
+        if cache is not None:
+            # Hand out the frozen entry, so a miss behaves like every later hit
+            trajectory, t, _ = cache.put(key, trajectory, t, self.solve_stats)
         return trajectory, t
 
-    def plot_empirical_attractor(self, trajectory, t):
-        """Plot the empirically-derived attractor with historical context"""
+    def solve(self, initial_state=None, t_span=50, method='LSODA', rtol=1e-6, atol=1e-9):
+        """
+        Integrate with solve_ivp and dense output
+
+        Returns the solve_ivp result; solution.sol(t) resamples the trajectory at
+        any times without re-integrating. Statistics go to self.solve_stats.
+        """
+        if initial_state is None:
+            initial_state = [50.0, 106.0, 2.5]
+        solution, self.solve_stats = integrate_solve_ivp(self, initial_state, t_span, method, rtol, atol)
+        return solution
+
+    def plot_empirical_attractor(self, trajectory, t, max_points=5000, downsample='lttb'):
+        """
+        Plot the empirically-derived attractor with historical context
+
+        max_points: point budget for the 3D line; longer trajectories are downsampled
+                    with downsample ('lttb' or 'curvature'), see trajectory_rendering.py
+        """
         fig = plt.figure(figsize=(16, 12))
 
         # 3D trajectory plot
         ax1 = fig.add_subplot(221, projection='3d')
         
-        # Plot the trajectory with color gradient (blue->red over time)
-        n_points = len(trajectory)
-        colors = plt.cm.viridis(np.linspace(0, 1, n_points))
-        
-        for i in range(n_points-1):
-            ax1.plot([trajectory[i, 0], trajectory[i+1, 0]], 
-                    [trajectory[i, 1], trajectory[i+1, 1]], 
-                    [trajectory[i, 2], trajectory[i+1, 2]], 
-                    color=colors[i], alpha=0.7, linewidth=0.5)
+        # Plot the trajectory with color gradient (blue->red over time) as a single collection
+        gradient_line_3d(ax1, trajectory, t, cmap='viridis', max_points=max_points, method=downsample,
+                         alpha=0.7, linewidth=0.5)
 
         # Mark starting point
         ax1.scatter([trajectory[0, 0]], [trajectory[0, 1]], [trajectory[0, 2]], 
@@ -170,29 +250,88 @@ class EmpiricalCivilizationAttractor:
         ax.plot_surface(X, Y, Z_high, alpha=0.05, color='red')
         ax.plot_surface(X, Y, Z_low, alpha=0.05, color='red')
 
-    def experiment_with_parameters(self, param_ranges):
+    def experiment_with_parameters(self, param_ranges, cache=None, t_span=30, n_points=3000, n_workers=None,
+                                   n_cols=None, max_points=1000, path=None, show=True):
         """
-        Experiment with different parameter values to find interesting dynamics
+        Small-multiple comparison of trajectories for many parameter sets
+
+        param_ranges: list of (name, sigma, rho, beta) or unnamed (sigma, rho, beta)
+                      rows, e.g. attractor_ensemble.parameter_grid(...)
+        cache: optional trajectory_cache.TrajectoryCache shared across experiments
+        n_workers: processes integrating the uncached cases before plotting (1 = serial)
+        n_cols: panels per row (default: a near-square layout)
+        max_points: per-panel point budget; longer trajectories are thinned with LTTB
+        path: save the sheet to this file; with show=False the figure is built off-screen
+        Returns the figure.
         """
-        fig, axes = plt.subplots(2, 2, figsize=(12, 10), subplot_kw={'projection': '3d'})
-        axes = axes.flatten()
-        
-        for i, (name, sigma, rho, beta) in enumerate(param_ranges):
-            # Create temporary system with new parameters
-            temp_system = EmpiricalCivilizationAttractor(sigma=sigma, rho=rho, beta=beta)
-            trajectory, t = temp_system.generate_trajectory(t_span=30, n_points=3000)
-            
-            ax = axes[i]
-            ax.plot(trajectory[:, 0], trajectory[:, 1], trajectory[:, 2], 
+        cases = [tuple(case) if len(case) == 4 else (None,) + tuple(case) for case in param_ranges]
+        trajectories = self._integrate_experiments([case[1:] for case in cases], cache, t_span, n_points,
+                                                   n_workers)
+
+        n_cols = n_cols or int(np.ceil(np.sqrt(len(cases))))
+        n_rows = int(np.ceil(len(cases) / n_cols))
+        figsize = (4 * n_cols, 3.5 * n_rows)
+        # Off-screen figures bypass pyplot, so large sheets never touch the GUI backend
+        fig = plt.figure(figsize=figsize) if show else Figure(figsize=figsize)
+
+        for i, ((name, sigma, rho, beta), trajectory) in enumerate(zip(cases, trajectories)):
+            ax = fig.add_subplot(n_rows, n_cols, i + 1, projection='3d')
+            if len(trajectory) > max_points:
+                trajectory = trajectory[lttb_downsample(trajectory, max_points)]
+            ax.plot(trajectory[:, 0], trajectory[:, 1], trajectory[:, 2],
                    lw=0.5, alpha=0.8)
             ax.scatter([50], [106], [2.5], color='red', s=50, label='Start')
             ax.set_xlabel('CO2 (GT/yr)')
             ax.set_ylabel('Materials (GT/yr)')
             ax.set_zlabel('Growth (%/yr)')
-            ax.set_title(f'{name}\nσ={sigma}, ρ={rho}, β={beta}')
-            
-        plt.tight_layout()
-        plt.show()
+            parameters = f'σ={sigma:g}, ρ={rho:g}, β={beta:g}'
+            ax.set_title(parameters if name is None else f'{name}\n{parameters}', fontsize=10)
+
+        if len(cases) <= 16:
+            fig.tight_layout()
+        else:
+            # tight_layout costs a full extra draw of every panel; fixed margins suit uniform grids
+            fig.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=0.97, wspace=0.15, hspace=0.3)
+        if path is not None:
+            fig.savefig(path, dpi=100)
+        if show:
+            plt.show()
+        return fig
+
+    def _integrate_experiments(self, params, cache, t_span, n_points, n_workers):
+        """Trajectories for (sigma, rho, beta) rows: cache hits first, the rest in parallel"""
+        trajectories = [None] * len(params)
+        missing = []
+        for i, (sigma, rho, beta) in enumerate(params):
+            if cache is not None:
+                system = EmpiricalCivilizationAttractor(sigma=sigma, rho=rho, beta=beta)
+                cached = cache.get(cache.key(system, [50.0, 106.0, 2.5], t_span, n_points))
+                if cached is not None:
+                    trajectories[i] = cached[0]
+                    continue
+            missing.append(i)
+
+        tasks = [(params[i], t_span, n_points) for i in missing]
+        if n_workers == 1 or len(tasks) <= 1:
+            results = [_experiment_trajectory(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                results = list(executor.map(_experiment_trajectory, tasks, chunksize=max(1, len(tasks) // 32)))
+
+        for i, (trajectory, t, stats) in zip(missing, results):
+            if cache is not None:
+                system = EmpiricalCivilizationAttractor(*params[i])
+                trajectory = cache.put(cache.key(system, [50.0, 106.0, 2.5], t_span, n_points), trajectory, t, stats)[0]
+            trajectories[i] = trajectory
+        return trajectories
+
+
+def _experiment_trajectory(args):
+    """Worker: trajectory from the 2024 state for one (sigma, rho, beta)"""
+    (sigma, rho, beta), t_span, n_points = args
+    system = EmpiricalCivilizationAttractor(sigma=sigma, rho=rho, beta=beta)
+    trajectory, t = system.generate_trajectory(t_span=t_span, n_points=n_points)
+    return trajectory, t, system.solve_stats
 
 
 if __name__ == "__main__":
@@ -205,9 +344,13 @@ if __name__ == "__main__":
     
     system = EmpiricalCivilizationAttractor()
 
+    # Repeated runs of this script reuse trajectories from the on-disk cache
+    cache = TrajectoryCache(cache_dir='.trajectory_cache')
+
     # Generate trajectory starting from current 2024 position
     print("\nGenerating trajectory from 2024 starting point...")
-    trajectory, t = system.generate_trajectory(t_span=50, n_points=5000)
+    trajectory, t = system.generate_trajectory(t_span=50, n_points=5000, cache=cache)
+    print(f"Solver: {format_solve_stats(system.solve_stats)}")
 
     # Plot the empirically-derived attractor
     print("Plotting results...")
@@ -222,4 +365,9 @@ if __name__ == "__main__":
         ("Faster Response", 0.05, 4.75, 0.7)
     ]
     
-    system.experiment_with_parameters(param_experiments)
+    system.experiment_with_parameters(param_experiments, cache=cache)
+
+    # A larger comparison sheet over a parameter grid, integrated in parallel and saved without a window
+    grid = list(itertools.product([0.01, 0.021, 0.05, 0.1], [3.0, 4.0, 4.75, 6.0], [0.3, 0.7, 1.5, 3.0]))
+    system.experiment_with_parameters(grid, cache=cache, n_cols=8, path='parameter_sheet.png', show=False)
+    print(f"Saved {len(grid)}-panel comparison sheet to parameter_sheet.png")
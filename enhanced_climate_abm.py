@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import norm
 
+from adoption_trace import AdoptionTrace
+
 
 class Agent:
     def __init__(self, id, type, wealth, environmental_awareness, location):
@@ -14,73 +16,144 @@ class Agent:
         self.location = location  # (x, y) coordinates
         self.neighbors = []
         self.annual_emissions = 20 if type == 'household' else 200  # tonnes CO2
+        self.technology_flags = 0  # Bit flags set by technology_adoption.TechnologyPortfolio
 
-    def decide_adoption(self, renewable_cost, fossil_cost, global_temperature, policy_incentive):
-        if self.has_renewables:
-            return False
-
+    def adoption_probability(self, renewable_cost, fossil_cost, global_temperature, policy_incentive,
+                             social_weight=0.3, adoption_scale=0.1, neighbor_adoption_rate=None):
         # Economic factors
         base_cost_difference = (fossil_cost - renewable_cost + policy_incentive) / fossil_cost
 
-        # Social influence from neighbors
-        neighbor_adoption_rate = sum(1 for n in self.neighbors if n.has_renewables) / max(len(self.neighbors), 1)
-        social_influence = 0.3 * neighbor_adoption_rate
+        # Social influence from neighbors (passed in from last year's buffer in synchronous mode)
+        if neighbor_adoption_rate is None:
+            neighbor_adoption_rate = sum(1 for n in self.neighbors if n.has_renewables) / max(len(self.neighbors), 1)
+        social_influence = social_weight * neighbor_adoption_rate
 
         # Environmental factor with regional climate impacts
         local_temp_impact = global_temperature * (1 + 0.2 * abs(self.location[1]) / 90)  # Higher impact near poles
         environmental_factor = self.environmental_awareness * local_temp_impact
 
         # Combined decision factor
-        adoption_probability = 0.1 * (base_cost_difference + social_influence + environmental_factor)
+        adoption_probability = adoption_scale * (base_cost_difference + social_influence + environmental_factor)
 
         # Wealth constraint with financing option
         annual_payment = renewable_cost / 10  # 10-year financing
         if self.wealth < renewable_cost and self.wealth < annual_payment * 2:
             adoption_probability *= 0.1
 
+        return max(0, min(1, adoption_probability))
+
+    def adopt(self, renewable_cost):
+        self.has_renewables = True
+        self.energy_cost = renewable_cost / 10  # Annual payment
+        self.annual_emissions *= 0.1  # 90% reduction in emissions
+
+    def decide_adoption(self, renewable_cost, fossil_cost, global_temperature, policy_incentive,
+                        social_weight=0.3, adoption_scale=0.1):
+        if self.has_renewables:
+            return False
+
+        adoption_probability = self.adoption_probability(renewable_cost, fossil_cost, global_temperature,
+                                                         policy_incentive, social_weight, adoption_scale)
+
         # Make adoption decision
-        if np.random.random() < max(0, min(1, adoption_probability)):
-            self.has_renewables = True
-            self.energy_cost = renewable_cost / 10  # Annual payment
-            self.annual_emissions *= 0.1  # 90% reduction in emissions
+        if np.random.random() < adoption_probability:
+            self.adopt(renewable_cost)
             return True
         return False
 
 
 class ClimateModel:
-    def __init__(self, n_households, n_firms):
+    def __init__(self, n_households, n_firms, wealth_mean=11, awareness_alpha=2, awareness_beta=5,
+                 temp_sensitivity=0.0000015, social_influence=0.3, base_carbon_price=30,
+                 adoption_scale=0.1, start_year=2024, initial_temperature=1.0, population=None,
+                 climate=None, global_emissions=40.0, update_mode='asynchronous', trace_adoptions=True,
+                 carbon_price_schedule=None):
+        if update_mode not in ('asynchronous', 'synchronous'):
+            raise ValueError(f"Unknown update mode: {update_mode}")
+
         self.agents = []
-        self.temperature = 1.0
-        self.year = 2024
+        self.temperature = initial_temperature
+        self.initial_temperature = initial_temperature
+        self.year = start_year
+        self.start_year = start_year
         self.cumulative_emissions = 0
         self.carbon_price = 0
 
-        # Define city centers
-        city_centers = [(30, 30), (-30, 30), (0, -30)]
-
-        # Initialize agents with spatial distribution
-        for i in range(n_households):
-            # Randomly select a city center
-            city_center = city_centers[np.random.randint(0, len(city_centers))]
-            # Add random noise to create clustering
-            location = (
-                city_center[0] + np.random.normal(0, 10),
-                city_center[1] + np.random.normal(0, 10)
-            )
-
-            wealth = np.random.lognormal(mean=11, sigma=1)
-            awareness = np.random.beta(2, 5)
-            self.agents.append(Agent(i, 'household', wealth, awareness, location))
-
-        for i in range(n_firms):
-            location = (np.random.uniform(-90, 90), np.random.uniform(-90, 90))
-            wealth = np.random.lognormal(mean=13, sigma=1.5)
-            awareness = np.random.beta(2, 5)
-            self.agents.append(Agent(i + n_households, 'firm', wealth, awareness, location))
+        # Behavioural and climate parameters (defaults are the hand-picked values)
+        self.temp_sensitivity = temp_sensitivity
+        self.social_influence = social_influence
+        self.base_carbon_price = base_carbon_price
+        self.adoption_scale = adoption_scale
+        self.wealth_mean = wealth_mean
+        self.awareness_alpha = awareness_alpha
+        self.awareness_beta = awareness_beta
+
+        # 'asynchronous' updates agents in place in list order; 'synchronous' reads last
+        # year's adoption state and writes next year's into a separate buffer
+        self.update_mode = update_mode
+
+        # Optional exogenous carbon price per year from start_year (last value held afterwards)
+        self.carbon_price_schedule = carbon_price_schedule
+
+        if population is not None:
+            # Agents from a PopulationGenerator array (see population_generator.py)
+            self._create_agents_from_population(population)
+        else:
+            # Define city centers
+            city_centers = [(30, 30), (-30, 30), (0, -30)]
+
+            # Initialize agents with spatial distribution
+            for i in range(n_households):
+                # Randomly select a city center
+                city_center = city_centers[np.random.randint(0, len(city_centers))]
+                # Add random noise to create clustering
+                location = (
+                    city_center[0] + np.random.normal(0, 10),
+                    city_center[1] + np.random.normal(0, 10)
+                )
+
+                wealth = np.random.lognormal(mean=wealth_mean, sigma=1)
+                awareness = np.random.beta(awareness_alpha, awareness_beta)
+                self.agents.append(Agent(i, 'household', wealth, awareness, location))
+
+            for i in range(n_firms):
+                location = (np.random.uniform(-90, 90), np.random.uniform(-90, 90))
+                wealth = np.random.lognormal(mean=wealth_mean + 2, sigma=1.5)
+                awareness = np.random.beta(awareness_alpha, awareness_beta)
+                self.agents.append(Agent(i + n_households, 'firm', wealth, awareness, location))
 
         # Set up neighbor networks
         self._establish_neighbor_networks()
 
+        # Per-agent adoption year and conditions at adoption (see adoption_trace.py)
+        self.adoption_trace = AdoptionTrace(len(self.agents)) if trace_adoptions else None
+
+        # Optional supplier-customer network (supply_chain.SupplyChainNetwork.from_model)
+        self.supply_chain = None
+        self.embedded_emissions = None
+
+        # Optional multi-technology adoption (technology_adoption.TechnologyPortfolio.from_model)
+        self.technologies = None
+
+        # Optional relocation/entry process (migration.MigrationProcess.from_model)
+        self.migration = None
+
+        # Optional climate module (e.g. climate_module.ImpulseResponseClimate); agent emissions
+        # are scaled so the initial total represents global_emissions GtCO2/yr
+        self.climate = climate
+        if climate is not None:
+            self.emissions_to_gtco2 = global_emissions / sum(a.annual_emissions for a in self.agents)
+            self.temperature_ensemble = climate.temperature
+            self.temperature = float(np.mean(self.temperature_ensemble))
+
+    def _create_agents_from_population(self, population):
+        # Population records carry id, type (0 household, 1 firm), x, y, wealth and awareness
+        columns = zip(population['id'].tolist(), population['type'].tolist(), population['x'].tolist(),
+                      population['y'].tolist(), population['wealth'].tolist(), population['awareness'].tolist())
+        for agent_id, agent_type, x, y, wealth, awareness in columns:
+            agent_type = 'household' if agent_type == 0 else 'firm'
+            self.agents.append(Agent(agent_id, agent_type, wealth, awareness, (x, y)))
+
     def _establish_neighbor_networks(self):
         # Create neighbor networks based on spatial proximity
         for agent in self.agents:
@@ -93,16 +166,44 @@ class ClimateModel:
                     )
                     distances.append((dist, other))
             # Connect to 10 nearest neighbors
-            agent.neighbors = [x[1] for x in sorted(distances)[:10]]
+            agent.neighbors = [x[1] for x in sorted(distances, key=lambda d: d[0])[:10]]
+
+        # Neighbor positions as an index array, for buffered reads in synchronous mode
+        position = {id(agent): i for i, agent in enumerate(self.agents)}
+        k = min(10, max(len(self.agents) - 1, 0))
+        self.neighbor_index = np.array(
+            [[position[id(n)] for n in agent.neighbors] for agent in self.agents], dtype=int
+        ).reshape(len(self.agents), k)
+
+    def adoption_state(self):
+        """Boolean array of which agents have adopted, in agent order"""
+        return np.fromiter((agent.has_renewables for agent in self.agents), dtype=bool, count=len(self.agents))
 
     def calculate_carbon_price(self):
+        if self.carbon_price_schedule is not None:
+            index = min(self.year - self.start_year, len(self.carbon_price_schedule) - 1)
+            self.carbon_price = self.carbon_price_schedule[index]
+            return
+
         # Carbon price increases with temperature and cumulative emissions
-        base_price = 30  # Starting carbon price
+        base_price = self.base_carbon_price  # Starting carbon price
         temp_multiplier = max(1, self.temperature ** 2)
         emission_multiplier = min(2, self.cumulative_emissions / 1e6)
         self.carbon_price = base_price * temp_multiplier * emission_multiplier
 
     def step(self, renewable_cost, fossil_cost):
+        """
+        Advance the model one year
+
+        renewable_cost, fossil_cost: costs of the single renewable decision. With a
+        TechnologyPortfolio attached they are unused (each technology prices itself
+        from its own learning curve and fossil alternative) and only reach the
+        adoption trace.
+        """
+        if self.technologies is not None and self.update_mode != 'synchronous':
+            raise ValueError("TechnologyPortfolio decisions read last year's flags; "
+                             "construct the ClimateModel with update_mode='synchronous'")
+
         # Update carbon price
         self.calculate_carbon_price()
         fossil_cost += self.carbon_price
@@ -110,29 +211,88 @@ class ClimateModel:
         # Calculate policy incentive based on temperature
         policy_incentive = max(0, (self.temperature - 1.5) * 20)
 
-        new_adoptions = 0
-        total_emissions = 0
-
-        # Update each agent
-        for agent in self.agents:
-            if agent.decide_adoption(renewable_cost, fossil_cost, self.temperature, policy_incentive):
-                new_adoptions += 1
-            total_emissions += agent.annual_emissions
+        if self.technologies is not None:
+            # One vectorised synchronous pass over every agent and technology replaces the
+            # single renewable decision; costs come from the portfolio's own learning curves
+            adopters = self.technologies.step(self, policy_incentive)
+        elif self.update_mode == 'synchronous':
+            adopters = self._synchronous_update(renewable_cost, fossil_cost, policy_incentive)
+        else:
+            adopters = []
+            # Update each agent in place; later agents see this year's earlier adopters
+            for i, agent in enumerate(self.agents):
+                if agent.decide_adoption(renewable_cost, fossil_cost, self.temperature, policy_incentive,
+                                         self.social_influence, self.adoption_scale):
+                    adopters.append(i)
+        new_adoptions = len(adopters)
+
+        if self.adoption_trace is not None:
+            self.adoption_trace.record(adopters, self.year, renewable_cost, fossil_cost, self.carbon_price)
+
+        total_emissions = sum(agent.annual_emissions for agent in self.agents)
+
+        if self.supply_chain is not None:
+            # Household embedded emissions fall as their suppliers adopt; reported
+            # separately since firm emissions are already in total_emissions
+            self.embedded_emissions = self.supply_chain.update_from_model(self)
 
         # Update global state
         self.cumulative_emissions += total_emissions
         adoption_rate = sum(1 for a in self.agents if a.has_renewables) / len(self.agents)
 
-        # More sophisticated temperature model based on cumulative emissions
-        self.temperature = 1.0 + 0.0000015 * self.cumulative_emissions
+        if self.climate is not None:
+            self.temperature_ensemble = self.climate.step(total_emissions * self.emissions_to_gtco2)
+            self.temperature = float(np.mean(self.temperature_ensemble))
+        else:
+            # More sophisticated temperature model based on cumulative emissions
+            self.temperature = self.initial_temperature + self.temp_sensitivity * self.cumulative_emissions
 
         self.year += 1
 
+        if self.migration is not None:
+            # Households move and enter at year end; neighbor lists are patched incrementally
+            self.migration.step(self)
+
         return new_adoptions, adoption_rate, self.temperature, total_emissions
 
+    def _synchronous_update(self, renewable_cost, fossil_cost, policy_incentive):
+        # Read buffer: last year's adoption state and the neighbor rates derived from it
+        previous = self.adoption_state()
+        if self.neighbor_index.shape[1]:
+            neighbor_rates = previous[self.neighbor_index].mean(axis=1)
+        else:
+            neighbor_rates = np.zeros(len(self.agents))
+
+        # One draw per agent up front, so outcomes do not depend on evaluation order
+        draws = np.random.random(len(self.agents))
+
+        # Write buffer: next year's state. Partitions only write their own entries,
+        # so any split of the agents can be evaluated concurrently
+        next_state = previous.copy()
+        self._decide_partition(np.arange(len(self.agents)), previous, neighbor_rates, draws, next_state,
+                               renewable_cost, fossil_cost, policy_incentive)
+
+        # Swap buffers: commit this year's adoptions together
+        newly_adopted = np.flatnonzero(next_state & ~previous)
+        for i in newly_adopted:
+            self.agents[i].adopt(renewable_cost)
+        return newly_adopted
+
+    def _decide_partition(self, indices, previous, neighbor_rates, draws, next_state,
+                          renewable_cost, fossil_cost, policy_incentive):
+        for i in indices:
+            if previous[i]:
+                continue
+            probability = self.agents[i].adoption_probability(
+                renewable_cost, fossil_cost, self.temperature, policy_incentive,
+                self.social_influence, self.adoption_scale, neighbor_adoption_rate=neighbor_rates[i]
+            )
+            next_state[i] = draws[i] < probability
+
 
-def run_enhanced_simulation(years=30):
-    model = ClimateModel(n_households=1000, n_firms=100)
+def run_enhanced_simulation(years=30, cost_engine=None, update_mode='asynchronous', trace_path=None,
+                            spatial_grid=None):
+    model = ClimateModel(n_households=1000, n_firms=100, update_mode=update_mode)
 
     # Initialize tracking variables
     temperatures = [model.temperature]
@@ -146,17 +306,30 @@ def run_enhanced_simulation(years=30):
     fossil_cost = 80
 
     for year in range(len(years) - 1):
-        # More sophisticated learning curve
-        current_adoption = sum(1 for a in model.agents if a.has_renewables)
-        learning_rate = 0.15  # 15% cost reduction for each doubling
-        renewable_cost = base_renewable_cost * (2 ** (np.log2(max(current_adoption + 1, 1)) * -learning_rate))
+        if cost_engine is not None:
+            # Multi-technology learning curves (see learning_curves.py), first ensemble member
+            renewable_cost = cost_engine.renewable_cost(base_renewable_cost)[0]
+        else:
+            # More sophisticated learning curve
+            current_adoption = sum(1 for a in model.agents if a.has_renewables)
+            learning_rate = 0.15  # 15% cost reduction for each doubling
+            renewable_cost = base_renewable_cost * (2 ** (np.log2(max(current_adoption + 1, 1)) * -learning_rate))
 
         results = model.step(renewable_cost, fossil_cost)
+        if spatial_grid is not None:
+            # Streaming spatial output stage (see spatial_maps.py)
+            spatial_grid.update_from_model(model)
+        if cost_engine is not None:
+            cost_engine.deploy_adoption(results[1] - adoption_rates[-1])
         temperatures.append(results[2])
         adoption_rates.append(results[1])
         emissions.append(results[3])
         carbon_prices.append(model.carbon_price)
 
+    # Export the per-agent adoption trace with the run
+    if trace_path is not None:
+        model.adoption_trace.save(trace_path, model)
+
     # Enhanced visualization
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
 
@@ -183,4 +356,5 @@ def run_enhanced_simulation(years=30):
 
 
 # Run the enhanced simulation
-run_enhanced_simulation()
\ No newline at end of file
+if __name__ == "__main__":
+    run_enhanced_simulation()
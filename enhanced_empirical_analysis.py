@@ -10,10 +10,14 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.integrate import odeint
-from scipy.optimize import minimize
 from mpl_toolkits.mplot3d import Axes3D
 import os
 
+from bootstrap_intervals import batched_least_squares, batched_r_squared, percentile_interval, \
+    resample, resample_indices
+from recursive_estimation import equation_masks, time_varying_parameters
+from trajectory_fitting import TrajectoryFitter, PARAMETER_NAMES, VARIABLES, plot_trajectory_fit
+
 
 class EnhancedEmpiricalAnalysis:
     def __init__(self, data_file="data/civilization_dynamics_1970_2024.csv"):
@@ -70,9 +74,19 @@ class EnhancedEmpiricalAnalysis:
         print(f"dMaterials/dt range: {self.df['dMaterials_dt'].min():.3f} to {self.df['dMaterials_dt'].max():.3f}")
         print(f"dGrowth/dt range: {self.df['dGrowth_dt'].min():.3f} to {self.df['dGrowth_dt'].max():.3f}")
     
-    def analyze_lorenz_relationships(self):
-        """Test Lorenz-like relationships with the full dataset"""
+    def _equation_masks(self, co2, materials, growth):
+        """Rows usable for fitting each of the three equations (shared with the recursive fits)"""
+        return equation_masks(co2, materials, growth)
+
+    def analyze_lorenz_relationships(self, n_bootstrap=2000, seed=0):
+        """
+        Test Lorenz-like relationships with the full dataset
+
+        Parameter uncertainties are block-bootstrap standard errors from
+        n_bootstrap replicates (see bootstrap_parameters).
+        """
         print("\\n=== Testing Lorenz-like Relationships (1970-2024) ===")
+        intervals = self.bootstrap_parameters(n_boot=n_bootstrap, seed=seed)
         
         # Extract variables
         co2 = self.df['co2_emissions_gt'].values
@@ -84,11 +98,11 @@ class EnhancedEmpiricalAnalysis:
         
         # Test Equation 1: dCO2/dt = σ(Materials - CO2)
         materials_co2_diff = materials - co2
-        mask1 = np.abs(materials_co2_diff) > 0.1  # Avoid division by near-zero
+        mask1, mask2, mask3 = self._equation_masks(co2, materials, growth)
         if np.sum(mask1) > 0:
             sigma_estimates = dco2_dt[mask1] / materials_co2_diff[mask1]
             sigma_mean = np.mean(sigma_estimates)
-            sigma_std = np.std(sigma_estimates)
+            sigma_std = intervals['sigma']['std']
             r2_eq1 = self.calculate_r_squared(dco2_dt[mask1], sigma_mean * materials_co2_diff[mask1])
         else:
             sigma_mean, sigma_std, r2_eq1 = 0, 0, 0
@@ -99,7 +113,6 @@ class EnhancedEmpiricalAnalysis:
         
         # Test Equation 2: dMaterials/dt = CO2*(ρ - Growth) - Materials  
         # Let's try a different approach - direct fitting rather than algebraic rearrangement
-        mask2 = (co2 > 1.0) & (np.abs(growth) < 10)  # Reasonable bounds
         if np.sum(mask2) > 5:  # Need minimum points for fitting
             # Use least squares to fit: dMat/dt = a*CO2 - b*CO2*Growth - c*Materials
             X2 = np.column_stack([co2[mask2], -co2[mask2] * growth[mask2], -materials[mask2]])
@@ -113,7 +126,7 @@ class EnhancedEmpiricalAnalysis:
                 rho_mean = a / np.mean(co2[mask2]) if np.mean(co2[mask2]) > 0 else 0
                 predicted_dmaterials = X2 @ params2
                 r2_eq2 = self.calculate_r_squared(y2, predicted_dmaterials)
-                rho_std = 0.5  # Placeholder since direct calculation is complex
+                rho_std = intervals['rho']['std']
             except np.linalg.LinAlgError:
                 rho_mean, rho_std, r2_eq2 = 0, 0, 0
         else:
@@ -124,7 +137,6 @@ class EnhancedEmpiricalAnalysis:
         print(f"R² = {r2_eq2:.3f}")
         
         # Test Equation 3: dGrowth/dt = CO2*Materials*α - β*Growth
-        mask3 = (np.abs(growth) > 0.1) & (np.abs(growth) < 10)  # Reasonable bounds
         if np.sum(mask3) > 5:
             X3 = np.column_stack([co2[mask3] * materials[mask3], -growth[mask3]])
             y3 = dgrowth_dt[mask3]
@@ -140,9 +152,13 @@ class EnhancedEmpiricalAnalysis:
             alpha, beta, r2_eq3 = 0, 1, 0
         
         print(f"\\nEquation 3: dGrowth/dt = α*CO2*Materials - β*Growth")
-        print(f"α = {alpha:.6f}")
-        print(f"β = {beta:.3f}")
+        print(f"α = {alpha:.6f} ± {intervals['alpha']['std']:.6f}")
+        print(f"β = {beta:.3f} ± {intervals['beta']['std']:.3f}")
         print(f"R² = {r2_eq3:.3f}")
+
+        print(f"\\nBlock-bootstrap {100 * intervals['confidence']:.0f}% intervals ({n_bootstrap} replicates):")
+        for name in ('sigma', 'rho', 'alpha', 'beta', 'r2_eq1', 'r2_eq2', 'r2_eq3'):
+            print(f"  {name:7s} [{intervals[name]['low']:.6g}, {intervals[name]['high']:.6g}]")
         
         # Data quality assessment
         print(f"\\nData Quality Assessment:")
@@ -157,11 +173,116 @@ class EnhancedEmpiricalAnalysis:
             'beta': beta,
             'sigma_std': sigma_std,
             'rho_std': rho_std,
+            'alpha_std': intervals['alpha']['std'],
+            'beta_std': intervals['beta']['std'],
             'r2_eq1': r2_eq1,
             'r2_eq2': r2_eq2,
-            'r2_eq3': r2_eq3
+            'r2_eq3': r2_eq3,
+            'intervals': intervals
         }
+
+    def bootstrap_parameters(self, n_boot=2000, method='block', block_length=5, confidence=0.95, seed=None):
+        """
+        Bootstrap confidence intervals for σ, ρ, α, β and the three R² values
+
+        method: 'block' (moving blocks of block_length years, keeping serial
+                correlation) or 'residual' (fixed design, resampled residuals)
+        All replicates of an equation are solved together in one batched solve.
+        Returns a dict of name -> {'estimate', 'std', 'low', 'high', 'samples'};
+        equations with too few usable rows have NaN entries.
+        """
+        rng = np.random.default_rng(seed)
+        co2 = self.df['co2_emissions_gt'].values
+        materials = self.df['material_use_gt'].values
+        growth = self.df['gdp_growth_percent'].values
+        mask1, mask2, mask3 = self._equation_masks(co2, materials, growth)
+        estimates, samples = {}, {}
+
+        # Same minimum-row checks as analyze_lorenz_relationships; skipped equations get NaN intervals
+        # Equation 1: σ is the mean of dCO2/dt / (Materials - CO2), i.e. the ratios regressed on a constant
+        if np.sum(mask1) > 0:
+            X1 = (materials - co2)[mask1][:, None]
+            y1 = self.df['dCO2_dt'].values[mask1]
+            estimates['sigma'] = np.mean(y1 / X1[:, 0])
+            estimates['r2_eq1'] = self.calculate_r_squared(y1, estimates['sigma'] * X1[:, 0])
+            indices = resample_indices(len(y1), n_boot, method, block_length, rng)
+            Xb, yb = resample(X1, y1, np.array([estimates['sigma']]), indices, method)
+            samples['sigma'] = batched_least_squares(np.ones_like(Xb), yb / Xb[:, :, 0])[:, 0]
+            samples['r2_eq1'] = batched_r_squared(yb, samples['sigma'][:, None] * Xb[:, :, 0])
+
+        # Equation 2: dMat/dt = a*CO2 - b*CO2*Growth - c*Materials, with ρ = a / mean(CO2)
+        if np.sum(mask2) > 5:
+            X2 = np.column_stack([co2[mask2], -co2[mask2] * growth[mask2], -materials[mask2]])
+            y2 = self.df['dMaterials_dt'].values[mask2]
+            try:
+                coefficients = np.linalg.lstsq(X2, y2, rcond=None)[0]
+            except np.linalg.LinAlgError:
+                coefficients = None
+            if coefficients is not None:
+                estimates['rho'] = coefficients[0] / np.mean(X2[:, 0])
+                estimates['r2_eq2'] = self.calculate_r_squared(y2, X2 @ coefficients)
+                indices = resample_indices(len(y2), n_boot, method, block_length, rng)
+                Xb, yb = resample(X2, y2, coefficients, indices, method)
+                replicates = batched_least_squares(Xb, yb)
+                samples['rho'] = replicates[:, 0] / Xb[:, :, 0].mean(axis=1)
+                samples['r2_eq2'] = batched_r_squared(yb, np.einsum('bnk,bk->bn', Xb, replicates))
+
+        # Equation 3: dGrowth/dt = α*CO2*Materials - β*Growth
+        if np.sum(mask3) > 5:
+            X3 = np.column_stack([co2[mask3] * materials[mask3], -growth[mask3]])
+            y3 = self.df['dGrowth_dt'].values[mask3]
+            try:
+                coefficients = np.linalg.lstsq(X3, y3, rcond=None)[0]
+            except np.linalg.LinAlgError:
+                coefficients = None
+            if coefficients is not None:
+                estimates['alpha'], estimates['beta'] = coefficients
+                estimates['r2_eq3'] = self.calculate_r_squared(y3, X3 @ coefficients)
+                indices = resample_indices(len(y3), n_boot, method, block_length, rng)
+                Xb, yb = resample(X3, y3, coefficients, indices, method)
+                replicates = batched_least_squares(Xb, yb)
+                samples['alpha'], samples['beta'] = replicates.T
+                samples['r2_eq3'] = batched_r_squared(yb, np.einsum('bnk,bk->bn', Xb, replicates))
+
+        intervals = {'method': method, 'confidence': confidence}
+        for name in ('sigma', 'r2_eq1', 'rho', 'r2_eq2', 'alpha', 'beta', 'r2_eq3'):
+            values = samples.get(name, np.full(n_boot, np.nan))
+            if np.all(np.isnan(values)):
+                low = high = std = np.nan
+            else:
+                (low, high), std = percentile_interval(values, confidence), np.nanstd(values)
+            intervals[name] = {'estimate': estimates.get(name, np.nan), 'std': std, 'low': low, 'high': high,
+                               'samples': values}
+        return intervals
     
+    def fit_trajectory(self, params=None, n_starts=32, n_workers=None, seed=0):
+        """
+        Fit sigma, rho, alpha and beta to the whole 1970-2024 trajectory
+
+        The ODE system is integrated from the 1970 state and the trajectory
+        error minimised from many random starts in parallel, plus the
+        algebraic estimates in params if they are usable as a start.
+        """
+        print("\n=== Full-Trajectory Fit (1970-2024) ===")
+        fitter = TrajectoryFitter(self.df['year'].values, self.df[list(VARIABLES)].values)
+        guesses = []
+        if params is not None and all(params[name] > 0 for name in PARAMETER_NAMES):
+            guesses.append({name: params[name] for name in PARAMETER_NAMES})
+            print(f"Algebraic estimates: trajectory loss "
+                  f"{fitter.loss([params[name] for name in PARAMETER_NAMES]):.4f}")
+
+        best = fitter.fit(n_starts=n_starts, initial_guesses=guesses, n_workers=n_workers, seed=seed)
+        print("Trajectory R²: " + ", ".join(f"{name} {value:.3f}" for name, value in best['r2'].items()))
+        self.trajectory_fitter = fitter
+        return best
+
+    def time_varying_parameters(self, window=15, forgetting=1.0, confidence=0.95):
+        """
+        Rolling (window years) or expanding (window=None, optional forgetting
+        factor) recursive least-squares estimates of σ, ρ, α and β by year
+        """
+        return time_varying_parameters(self.df, window=window, forgetting=forgetting, confidence=confidence)
+
     def calculate_r_squared(self, y_true, y_pred):
         """Calculate R-squared coefficient"""
         if len(y_true) == 0 or len(y_pred) == 0:
@@ -343,3 +464,7 @@ if __name__ == "__main__":
     # Run the comprehensive analysis
     analyzer = EnhancedEmpiricalAnalysis()
     params, fig = analyzer.run_complete_analysis()
+
+    # Parameters that reproduce the observed trajectory, not just the derivatives
+    fit = analyzer.fit_trajectory(params)
+    plot_trajectory_fit(analyzer.trajectory_fitter, [params, fit['params']], ['Algebraic estimates', 'Trajectory fit'])
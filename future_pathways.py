@@ -2,23 +2,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import CheckButtons
 from dataclasses import dataclass
-from typing import Tuple, List, Dict, Optional
+from typing import Tuple, List, Dict
 
-
-@dataclass
-class ZoneConfig:
-    """Configuration for a transition zone"""
-    name: str
-    color: str
-    growth_range: Tuple[float, float]
-    material_range: Tuple[float, float]
-    emission_range: Tuple[float, float]
-    text_position: Tuple[float, float, float]
-    surfaces: List = None
-    text_handle: Optional[object] = None
-
-    def __post_init__(self):
-        self.surfaces = [] if self.surfaces is None else self.surfaces
+from transition_zones import zone_configs
 
 
 @dataclass
@@ -63,40 +49,7 @@ class PathwayVisualizer:
         self.historical_materials = np.array([45.0, 54.0, 65.0, 78.0, 88.0, 98.0, 106.0])  # Gt
 
         # Initialize zones configuration
-        self.zones = {
-            'Energy Transition Zone': ZoneConfig(
-                name='Energy Transition Zone',
-                color='green',
-                growth_range=(2.5, 5),
-                material_range=(0, 106),
-                emission_range=(-20, 50),
-                text_position=(0, 50, 3.75)
-            ),
-            'Intermediate Zone': ZoneConfig(
-                name='Intermediate Zone',
-                color='orange',
-                growth_range=(0, 2.5),
-                material_range=(0, 106),
-                emission_range=(-20, 50),
-                text_position=(0, 50, 1.25)
-            ),
-            'Descent Zone': ZoneConfig(
-                name='Descent Zone',
-                color='red',
-                growth_range=(-5, 0),
-                material_range=(0, 106),
-                emission_range=(-20, 50),
-                text_position=(0, 50, -2.5)
-            ),
-            'Future Materials Use': ZoneConfig(
-                name='Future Materials Use',
-                color='blue',
-                growth_range=(-5, 5),
-                material_range=(106, 160),
-                emission_range=(-20, 50),
-                text_position=(0, 130, 0)
-            )
-        }
+        self.zones = zone_configs()
 
         # Initialize paths configuration
         self.paths = self._initialize_paths()
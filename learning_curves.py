@@ -0,0 +1,151 @@
+"""
+Multi-technology Wright's-law cost engine
+
+Each technology follows Wright's law with a floor cost,
+
+    cost = floor + (initial - floor) * (cumulative / initial_cumulative) ** -b,
+    b = -log2(1 - learning_rate),
+
+where learning_rate is the fractional cost reduction per doubling of
+cumulative deployment. In the spirit of Way et al. (2022), learning rates are
+drawn per ensemble member and an optional per-step log-cost shock follows a
+random walk. All state is held as (n_ensemble, n_technologies) arrays so the
+engine stays cheap inside large ensembles.
+
+The composite renewable cost seen by ClimateModel agents is the share-weighted
+technology cost, normalised to the ABM's base renewable cost.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+@dataclass
+class TechnologyConfig:
+    """Learning-curve parameters for one technology (costs are indices, 2024 = 1)"""
+    name: str
+    learning_rate: float             # Cost reduction per doubling of cumulative deployment
+    floor_cost: float                # Cost the curve approaches asymptotically
+    initial_deployment: float        # Cumulative deployment at the start
+    full_adoption_deployment: float  # Cumulative deployment when ABM adoption reaches 100%
+    share: float                     # Weight in the composite renewable cost
+    learning_rate_std: float = 0.0   # Per-member uncertainty in the learning rate
+    initial_cost: float = 1.0
+
+
+# Approximate values; learning rates follow the experience exponents in Way et al. (2022)
+DEFAULT_TECHNOLOGIES = [
+    TechnologyConfig('solar', learning_rate=0.20, floor_cost=0.15, initial_deployment=1600,
+                     full_adoption_deployment=20000, share=0.4, learning_rate_std=0.03),  # GW
+    TechnologyConfig('wind', learning_rate=0.13, floor_cost=0.35, initial_deployment=1000,
+                     full_adoption_deployment=8000, share=0.3, learning_rate_std=0.03),   # GW
+    TechnologyConfig('batteries', learning_rate=0.25, floor_cost=0.15, initial_deployment=2000,
+                     full_adoption_deployment=50000, share=0.2, learning_rate_std=0.04),  # GWh
+    TechnologyConfig('electrolysers', learning_rate=0.09, floor_cost=0.25, initial_deployment=2,
+                     full_adoption_deployment=3000, share=0.1, learning_rate_std=0.03),   # GW
+]
+
+
+class LearningCurveEngine:
+    def __init__(self, technologies=DEFAULT_TECHNOLOGIES, n_ensemble=1, step_noise=0.0, seed=None):
+        """
+        technologies: list of TechnologyConfig
+        n_ensemble: number of ensemble members evaluated together
+        step_noise: standard deviation of the per-step log-cost shock (random walk)
+        """
+        self.rng = np.random.default_rng(seed)
+        self.technologies = list(technologies)
+        self.names = [tech.name for tech in self.technologies]
+        self.n_ensemble = n_ensemble
+        self.step_noise = step_noise
+
+        def column(attribute):
+            return np.array([getattr(tech, attribute) for tech in self.technologies], dtype=float)
+
+        self.initial_cost = column('initial_cost')
+        self.floor_cost = column('floor_cost')
+        self.initial_deployment = column('initial_deployment')
+        self.full_adoption_deployment = column('full_adoption_deployment')
+        self.shares = column('share') / column('share').sum()
+
+        learning_rates = self.rng.normal(column('learning_rate'), column('learning_rate_std'),
+                                         size=(n_ensemble, len(self.technologies)))
+        self.learning_rates = np.clip(learning_rates, 0.0, 0.6)
+        self.exponents = -np.log2(1 - self.learning_rates)
+
+        self.cumulative = np.tile(self.initial_deployment, (n_ensemble, 1))
+        self.log_noise = np.zeros((n_ensemble, len(self.technologies)))
+
+    def costs(self):
+        """Current (n_ensemble, n_technologies) cost array"""
+        experience = self.cumulative / self.initial_deployment
+        learned = (self.initial_cost - self.floor_cost) * experience ** -self.exponents
+        return (self.floor_cost + learned) * np.exp(self.log_noise)
+
+    def renewable_cost(self, base_cost=100):
+        """Composite (n_ensemble,) renewable cost, equal to base_cost at the start"""
+        return base_cost * (self.costs() @ self.shares) / (self.initial_cost @ self.shares)
+
+    def deploy(self, additions):
+        """
+        Add deployment and advance the cost noise by one step
+
+        additions: per-technology (n_technologies,) or (n_ensemble, n_technologies) array
+        """
+        self.cumulative = self.cumulative + np.broadcast_to(additions, self.cumulative.shape)
+        if self.step_noise:
+            self.log_noise += self.rng.normal(0, self.step_noise, size=self.log_noise.shape)
+
+    def deploy_adoption(self, adoption_increase):
+        """
+        Deploy in proportion to the rise in ABM adoption rate
+
+        adoption_increase: scalar or (n_ensemble,) increase in the fraction of adopting agents;
+        a rise from 0 to 1 takes each technology from initial to full-adoption deployment.
+        """
+        adoption_increase = np.asarray(adoption_increase, dtype=float).reshape(-1, 1)
+        self.deploy(adoption_increase * (self.full_adoption_deployment - self.initial_deployment))
+
+
+if __name__ == "__main__":
+    from enhanced_climate_abm import ClimateModel
+
+    years = 30
+    n_ensemble = 20
+    years_list = np.arange(2024, 2024 + years + 1)
+
+    # Lock-step ensemble: every ABM member reads its own composite cost from one array evaluation
+    engine = LearningCurveEngine(n_ensemble=n_ensemble, step_noise=0.05, seed=0)
+    models = [ClimateModel(n_households=300, n_firms=30) for _ in range(n_ensemble)]
+    fossil_cost = 80
+
+    technology_costs = [engine.costs()]
+    adoption = np.zeros((years + 1, n_ensemble))
+    for year in range(years):
+        renewable_costs = engine.renewable_cost()
+        for i, model in enumerate(models):
+            adoption[year + 1, i] = model.step(renewable_costs[i], fossil_cost)[1]
+        engine.deploy_adoption(adoption[year + 1] - adoption[year])
+        technology_costs.append(engine.costs())
+
+    technology_costs = np.array(technology_costs)
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    for t, name in enumerate(engine.names):
+        ax1.fill_between(years_list, np.percentile(technology_costs[:, :, t], 10, axis=1),
+                         np.percentile(technology_costs[:, :, t], 90, axis=1), alpha=0.2)
+        ax1.plot(years_list, np.median(technology_costs[:, :, t], axis=1), label=name)
+    ax1.set_ylabel('Cost index (2024 = 1)')
+    ax1.set_xlabel('Year')
+    ax1.set_title("Wright's-Law Technology Costs")
+    ax1.legend()
+
+    ax2.plot(years_list, adoption, color='steelblue', alpha=0.4)
+    ax2.set_ylabel('Renewable Energy Adoption Rate')
+    ax2.set_xlabel('Year')
+    ax2.set_title('ABM Ensemble Adoption')
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,337 @@
+"""
+Lyapunov-exponent atlas of the attractor models over parameter space
+
+For every point of a 2-D parameter grid (two of sigma, rho and beta, with the
+third held fixed) the trajectory and a set of tangent vectors are advanced
+together with an RK4 scheme, batched over all grid points in a chunk through
+ensemble_system_eqs and ensemble_jacobian. Every few steps the tangent
+vectors are re-orthonormalised with a batched QR decomposition and the logs of
+the diagonal of R are accumulated (Benettin's method), giving the leading
+Lyapunov exponents per unit time (years).
+
+Explicit RK4 is only stable while the step times the Jacobian's spectral
+radius stays small, so before each block of steps dt is split, per grid
+point, into enough sub-steps for a bound on that radius. Stiff regimes
+(large sigma) then stay bounded instead of overflowing, and only the stiff
+points pay for the smaller step.
+
+Chunks of grid points are spread over worker processes and written into an
+on-disk .npy memmap as they finish, so large atlases never need to fit in
+memory. The largest exponent classifies each point: positive is chaotic,
+near zero a limit cycle (or quasi-periodic), negative a stable fixed point.
+Points whose trajectory leaves the divergence bounds are marked diverged, and
+points the integrator could not follow (a step beyond max_substeps, or an
+overflow) are marked numerically unstable rather than given a regime.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap
+
+
+PARAMETERS = ('sigma', 'rho', 'beta')
+REGIME_NAMES = ('Fixed point', 'Limit cycle', 'Chaotic', 'Diverged', 'Numerically unstable')
+
+# Status codes returned by lyapunov_spectrum
+CONVERGED, DIVERGED, UNSTABLE = 0, 1, 2
+
+# Largest |h λ| allowed per RK4 step (RK4 is stable up to about 2.8 on both axes)
+STABILITY_LIMIT = 2.0
+
+
+def _derivatives(system, states, tangents, sigma, rho, beta):
+    J = system.ensemble_jacobian(states, 0, sigma, rho, beta)
+    return system.ensemble_system_eqs(states, 0, sigma, rho, beta), J @ tangents
+
+
+def _rk4_step(system, states, tangents, dt, sigma, rho, beta):
+    """One RK4 step of the states and the variational equation dQ/dt = J(x) Q"""
+    k1x, k1q = _derivatives(system, states, tangents, sigma, rho, beta)
+    k2x, k2q = _derivatives(system, states + dt / 2 * k1x, tangents + dt / 2 * k1q, sigma, rho, beta)
+    k3x, k3q = _derivatives(system, states + dt / 2 * k2x, tangents + dt / 2 * k2q, sigma, rho, beta)
+    k4x, k4q = _derivatives(system, states + dt * k3x, tangents + dt * k3q, sigma, rho, beta)
+    return (states + dt / 6 * (k1x + 2 * k2x + 2 * k3x + k4x),
+            tangents + dt / 6 * (k1q + 2 * k2q + 2 * k3q + k4q))
+
+
+def _substeps_needed(system, states, dt, scales, sigma, rho, beta):
+    """RK4 sub-steps per dt for each member, from an upper bound on the Jacobian's spectral radius"""
+    J = system.ensemble_jacobian(states, 0, sigma, rho, beta)
+    # The row-sum norm of D⁻¹ J D (D = diag(scales)) bounds the spectral radius of J and,
+    # unlike the unscaled norm, is not inflated by the different units of the variables
+    radius = np.sum(np.abs(J * scales[None, None, :] / scales[None, :, None]), axis=2).max(axis=1)
+    return np.ceil(dt * radius / STABILITY_LIMIT)
+
+
+def _advance_block(system, states, tangents, dt, substeps, qr_every, sigma, rho, beta):
+    """
+    Advance members sharing a sub-step count through qr_every steps of dt
+
+    The tangents are re-orthonormalised every qr_every sub-steps, so that strongly
+    contracting directions are not lost to round-off between decompositions.
+    Returns the states, tangents, summed log growth of each tangent direction and
+    a mask of members that overflowed.
+    """
+    h = dt / substeps
+    log_growth = np.zeros((len(states), tangents.shape[2]))
+    overflow = np.zeros(len(states), dtype=bool)
+    for _ in range(substeps):
+        with np.errstate(over='ignore', invalid='ignore'):
+            for _ in range(qr_every):
+                states, tangents = _rk4_step(system, states, tangents, h, sigma, rho, beta)
+
+        bad = ~np.all(np.isfinite(states), axis=1) | ~np.all(np.isfinite(tangents), axis=(1, 2))
+        overflow |= bad
+        tangents[bad] = np.eye(3)[:, :tangents.shape[2]]  # Keep the QR finite; the caller discards these
+
+        Q, R = np.linalg.qr(tangents)
+        diagonal = np.abs(np.diagonal(R, axis1=1, axis2=2))
+        tangents = np.ascontiguousarray(Q)
+        log_growth += np.log(np.maximum(diagonal, 1e-300))
+    return states, tangents, log_growth, overflow
+
+
+def lyapunov_spectrum(system, params, initial_state=(50.0, 106.0, 2.5), t_transient=50.0, t_total=200.0,
+                      dt=0.01, qr_every=10, n_exponents=3, divergence_limit=1e6, max_substeps=1000,
+                      return_status=False):
+    """
+    Leading Lyapunov exponents for each row of params
+
+    params: (n, 3) rows of (sigma, rho, beta)
+    t_transient: time integrated before exponents are accumulated
+    t_total: averaging time after the transient
+    dt: output step; each is split into as many RK4 sub-steps as the Jacobian requires
+    qr_every: RK4 (sub-)steps between QR re-orthonormalisations
+    n_exponents: 1 for the largest exponent only, up to 3 for the full spectrum
+    divergence_limit: states beyond this many multiples of the system scales count as diverged
+    max_substeps: members needing more sub-steps per dt than this are marked UNSTABLE;
+                  each member is stepped with its own sub-step count (rounded up to a
+                  power of two), so stiff members only slow themselves down
+
+    Returns an (n, n_exponents) array (NaN where the trajectory diverged or
+    could not be integrated), and the (n,) status codes (CONVERGED, DIVERGED,
+    UNSTABLE) if return_status is set.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    sigma, rho, beta = params.T
+    n = len(params)
+    scales = np.array([system.emissions_scale, system.materials_scale, system.growth_scale])
+
+    states = np.tile(np.asarray(initial_state, dtype=float), (n, 1))
+    tangents = np.tile(np.eye(3)[:, :n_exponents], (n, 1, 1))
+    log_growth = np.zeros((n, n_exponents))
+    status = np.full(n, CONVERGED, dtype=np.int8)
+
+    n_transient = int(round(t_transient / dt / qr_every))
+    n_blocks = n_transient + int(round(t_total / dt / qr_every))
+    for block in range(n_blocks):
+        active = status == CONVERGED
+        needed = np.ones(n)
+        needed[active] = _substeps_needed(system, states[active], dt, scales,
+                                          sigma[active], rho[active], beta[active])
+        # Failed members are no longer stepped
+        stiff = active & ~(needed <= max_substeps)
+        status[stiff] = UNSTABLE
+        active &= ~stiff
+        needed[~active] = 1
+
+        # Members are stepped in groups sharing a sub-step count, so one stiff member does
+        # not force the whole batch onto its small step. Counts are rounded up to powers of
+        # two, which caps the number of groups at about log2(max_substeps)
+        substeps = 2 ** np.ceil(np.log2(np.maximum(needed, 1))).astype(int)
+        for count in np.unique(substeps[active]):
+            members = np.flatnonzero(active & (substeps == count))
+            states[members], tangents[members], growth, overflow = _advance_block(
+                system, states[members], tangents[members], dt, count, qr_every,
+                sigma[members], rho[members], beta[members])
+            if block >= n_transient:
+                log_growth[members] += growth
+
+            # With the step matched to the Jacobian an overflow is an integrator failure, while
+            # a finite state beyond the limits is a genuinely diverging trajectory
+            outside = np.any(np.abs(states[members]) > divergence_limit * scales, axis=1) & ~overflow
+            status[members[overflow]] = UNSTABLE
+            status[members[outside]] = DIVERGED
+
+    exponents = log_growth / (t_total if n_blocks > n_transient else np.nan)
+    exponents[status != CONVERGED] = np.nan
+    if return_status:
+        return exponents, status
+    return exponents
+
+
+def classify_regimes(largest_exponent, tol=0.01, status=None):
+    """
+    0 fixed point, 1 limit cycle, 2 chaotic, 3 diverged, 4 numerically unstable (see REGIME_NAMES)
+
+    status: lyapunov_spectrum status codes; without them every NaN exponent counts as diverged
+    """
+    largest_exponent = np.asarray(largest_exponent)
+    regimes = np.where(largest_exponent > tol, 2, np.where(largest_exponent < -tol, 0, 1))
+    regimes = np.where(np.isnan(largest_exponent), 3, regimes)
+    if status is not None:
+        regimes = np.where(np.asarray(status) == UNSTABLE, 4, regimes)
+    return regimes
+
+
+def _atlas_chunk(args):
+    """Worker: exponents and status codes for one chunk of flattened grid points"""
+    start, system, params, kwargs = args
+    return (start,) + lyapunov_spectrum(system, params, return_status=True, **kwargs)
+
+
+class LyapunovAtlas:
+    def __init__(self, system, x_parameter, x_values, y_parameter, y_values):
+        """
+        system: attractor supplying the fixed third parameter and the equations
+        x_parameter, y_parameter: two distinct names from PARAMETERS
+        x_values, y_values: grid values along each axis
+        """
+        if x_parameter not in PARAMETERS or y_parameter not in PARAMETERS or x_parameter == y_parameter:
+            raise ValueError(f"x_parameter and y_parameter must be two distinct names from {PARAMETERS}")
+        self.system = system
+        self.x_parameter = x_parameter
+        self.y_parameter = y_parameter
+        self.x_values = np.asarray(x_values, dtype=float)
+        self.y_values = np.asarray(y_values, dtype=float)
+        self.exponents = None
+        self.status = None
+
+    def grid_params(self):
+        """(ny * nx, 3) parameter rows in row-major (y, x) order"""
+        X, Y = np.meshgrid(self.x_values, self.y_values)
+        columns = {name: np.full(X.size, getattr(self.system, name), dtype=float) for name in PARAMETERS}
+        columns[self.x_parameter] = X.ravel()
+        columns[self.y_parameter] = Y.ravel()
+        return np.column_stack([columns[name] for name in PARAMETERS])
+
+    def compute(self, path=None, n_exponents=1, chunk_size=2000, n_workers=None, verbose=True, **kwargs):
+        """
+        Compute the atlas, optionally straight into a .npy memmap at path
+
+        kwargs are passed to lyapunov_spectrum (t_transient, t_total, dt, ...).
+        Grid points are chunked in order of their estimated stiffness, so stiff
+        points, which need many RK4 sub-steps, share chunks instead of being
+        stepped in small groups inside every chunk.
+        Returns the (ny, nx, n_exponents) exponent array (a memmap if path is
+        given); the (ny, nx) status codes are kept in self.status (saved next
+        to path as <root>_status.npy).
+        """
+        params = self.grid_params()
+        shape = (len(self.y_values), len(self.x_values), n_exponents)
+        if path is not None:
+            exponents = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+            status = np.lib.format.open_memmap(os.path.splitext(path)[0] + '_status.npy', mode='w+',
+                                               dtype=np.int8, shape=shape[:2])
+            self._save_axes(path)
+        else:
+            exponents = np.empty(shape, dtype=np.float32)
+            status = np.empty(shape[:2], dtype=np.int8)
+        flat = exponents.reshape(-1, n_exponents)
+        flat_status = status.reshape(-1)
+
+        kwargs['n_exponents'] = n_exponents
+        order = self.stiffness_order(params, kwargs.get('initial_state', (50.0, 106.0, 2.5)), kwargs.get('dt', 0.01))
+        tasks = [(start, self.system, params[order[start:start + chunk_size]], kwargs)
+                 for start in range(0, len(params), chunk_size)]
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(_atlas_chunk, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                start, chunk, chunk_status = future.result()
+                positions = order[start:start + len(chunk)]
+                flat[positions] = chunk
+                flat_status[positions] = chunk_status
+                if verbose:
+                    print(f"Chunk {done}/{len(tasks)} done ({time.perf_counter() - started:.0f} s)")
+
+        if path is not None:
+            exponents.flush()
+            status.flush()
+        self.exponents = exponents
+        self.status = status
+        return exponents
+
+    def stiffness_order(self, params, initial_state, dt):
+        """Grid point order by the RK4 sub-steps each needs at the initial state"""
+        scales = np.array([self.system.emissions_scale, self.system.materials_scale, self.system.growth_scale])
+        states = np.tile(np.asarray(initial_state, dtype=float), (len(params), 1))
+        with np.errstate(over='ignore', invalid='ignore'):
+            needed = _substeps_needed(self.system, states, dt, scales, *params.T)
+        return np.argsort(np.nan_to_num(needed, nan=np.inf), kind='stable')
+
+    def _save_axes(self, path):
+        root, _ = os.path.splitext(path)
+        np.savez(root + '_axes.npz', x_values=self.x_values, y_values=self.y_values,
+                 x_parameter=self.x_parameter, y_parameter=self.y_parameter,
+                 fixed=np.array([getattr(self.system, name) for name in PARAMETERS]))
+
+    @staticmethod
+    def load(path):
+        """Load a saved atlas; returns a dict with exponents and status (memmaps) and the grid axes"""
+        root, _ = os.path.splitext(path)
+        with np.load(root + '_axes.npz') as axes:
+            atlas = {name: axes[name] for name in axes.files}
+        atlas['x_parameter'] = str(atlas['x_parameter'])
+        atlas['y_parameter'] = str(atlas['y_parameter'])
+        atlas['exponents'] = np.load(path, mmap_mode='r')
+        status_path = root + '_status.npy'
+        atlas['status'] = np.load(status_path, mmap_mode='r') if os.path.exists(status_path) else None
+        return atlas
+
+    def plot(self, exponent=0):
+        plot_atlas(self.exponents, self.x_values, self.y_values, self.x_parameter, self.y_parameter, exponent,
+                   self.status)
+
+
+def plot_atlas(exponents, x_values, y_values, x_parameter, y_parameter, exponent=0, status=None):
+    """Heatmap of one Lyapunov exponent next to the regime classification"""
+    symbols = {'sigma': 'σ', 'rho': 'ρ', 'beta': 'β'}
+    extent = (x_values[0], x_values[-1], y_values[0], y_values[-1])
+    values = np.asarray(exponents[:, :, exponent], dtype=float)
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    limit = np.nanmax(np.abs(values)) if np.any(np.isfinite(values)) else 1
+    image = ax1.imshow(values, origin='lower', extent=extent, aspect='auto', cmap='RdBu_r',
+                       vmin=-limit, vmax=limit)
+    fig.colorbar(image, ax=ax1, label=f'λ{exponent + 1} (1/year)')
+    ax1.set_title(f'Lyapunov Exponent λ{exponent + 1}')
+
+    regimes = classify_regimes(np.asarray(exponents[:, :, 0], dtype=float), status=status)
+    colors = ListedColormap(['steelblue', 'gold', 'firebrick', 'lightgrey', 'black'])
+    image = ax2.imshow(regimes, origin='lower', extent=extent, aspect='auto', cmap=colors, vmin=-0.5, vmax=4.5)
+    colorbar = fig.colorbar(image, ax=ax2, ticks=range(5))
+    colorbar.ax.set_yticklabels(REGIME_NAMES)
+    ax2.set_title('Dynamical Regime (from λ1)')
+
+    for ax in (ax1, ax2):
+        ax.set_xlabel(symbols[x_parameter])
+        ax.set_ylabel(symbols[y_parameter])
+
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    from transition_attractor import RealisticTransitionAttractor
+
+    # Classic Lorenz-type damping so the scan includes a chaotic region
+    system = RealisticTransitionAttractor(sigma=10.0, rho=28.0, beta=8 / 3)
+    atlas = LyapunovAtlas(system, 'sigma', np.linspace(0.5, 20, 200), 'rho', np.linspace(0.5, 50, 200))
+
+    start = time.perf_counter()
+    atlas.compute('lyapunov_atlas.npy', n_exponents=1, t_transient=20, t_total=60, dt=0.01, verbose=False)
+    print(f"200x200 atlas in {time.perf_counter() - start:.0f} s")
+
+    check = lyapunov_spectrum(system, [[10.0, 28.0, 8 / 3]], initial_state=(50.0, 106.0, 2.5), t_total=200,
+                              n_exponents=3)[0]
+    print(f"Full spectrum at σ=10, ρ=28, β=8/3: {np.round(check, 3)} (sum {check.sum():.3f}, "
+          f"expected {-(10 + 1 + 8 / 3):.3f})")
+
+    saved = LyapunovAtlas.load('lyapunov_atlas.npy')
+    plot_atlas(saved['exponents'], saved['x_values'], saved['y_values'], saved['x_parameter'],
+               saved['y_parameter'], status=saved['status'])
@@ -0,0 +1,221 @@
+"""
+Time-varying estimation of the equation coefficients with recursive least squares
+
+The algebraic fit in EnhancedEmpiricalAnalysis uses one window over all
+1970-2024 data. Here the three regressions
+
+    dCO2/dt       = σ (Materials - CO2)
+    dMaterials/dt = a CO2 - b CO2 Growth - c Materials,   ρ = a / mean(CO2)
+    dGrowth/dt    = α CO2 Materials - β Growth
+
+are tracked through time. Each year updates the estimates with a rank-one
+Sherman-Morrison step on the inverse normal matrix, so a year costs O(k²)
+for k coefficients, independent of the window length:
+
+- expanding window: observations are only added, optionally discounted by a
+  forgetting factor λ < 1 (an effective memory of about 1 / (1 - λ) years),
+- rolling window: each new year is added and the year leaving the window is
+  removed with the matching rank-one downdate.
+
+Standard errors come from the diagonal of the inverse normal matrix scaled
+by the recursively tracked residual variance. Each regression uses the same
+rows as the full-sample fit (equation_masks). σ here is the least-squares
+slope through the origin, not the mean of yearly ratios used in
+analyze_lorenz_relationships.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from scipy import stats
+
+
+def equation_masks(co2, materials, growth):
+    """Rows usable for fitting each of the three equations"""
+    mask1 = np.abs(materials - co2) > 0.1  # Avoid division by near-zero
+    mask2 = (co2 > 1.0) & (np.abs(growth) < 10)  # Reasonable bounds
+    mask3 = (np.abs(growth) > 0.1) & (np.abs(growth) < 10)  # Reasonable bounds
+    return mask1, mask2, mask3
+
+
+class RecursiveLeastSquares:
+    def __init__(self, n_features, forgetting=1.0):
+        """
+        n_features: number of regression coefficients
+        forgetting: weight λ applied to past observations at every update (1 = no forgetting)
+        """
+        self.n_features = n_features
+        self.forgetting = forgetting
+        self.theta = None
+        self.P = None          # Inverse of the (discounted) normal matrix X'X
+        self.sse = 0.0         # Discounted residual sum of squares
+        self.weight = 0.0      # Effective number of observations
+        self.pending = []      # Observations held until X'X becomes invertible
+
+    def _initialize(self):
+        X = np.array([x for x, _ in self.pending])
+        y = np.array([y for _, y in self.pending])
+        w = self.forgetting ** np.arange(len(y) - 1, -1, -1)
+        XtX = X.T @ (w[:, None] * X)
+        if np.linalg.matrix_rank(XtX) < self.n_features:
+            return
+        self.P = np.linalg.inv(XtX)
+        self.theta = self.P @ X.T @ (w * y)
+        self.sse = float(np.sum(w * (y - X @ self.theta) ** 2))
+        self.weight = float(np.sum(w))
+        self.pending = []
+
+    def update(self, x, y):
+        """Add one observation (x: (k,) regressors, y: response)"""
+        x = np.asarray(x, dtype=float)
+        if self.P is None:
+            self.pending.append((x, float(y)))
+            if len(self.pending) >= self.n_features:
+                self._initialize()
+            return
+
+        lam = self.forgetting
+        Px = self.P @ x
+        denominator = lam + x @ Px
+        error = y - x @ self.theta
+        gain = Px / denominator
+        self.theta = self.theta + gain * error
+        self.P = (self.P - np.outer(gain, Px)) / lam
+        self.sse = lam * self.sse + error ** 2 * lam / denominator
+        self.weight = lam * self.weight + 1
+
+    def downdate(self, x, y):
+        """Remove an earlier observation (only valid without forgetting)"""
+        x = np.asarray(x, dtype=float)
+        if self.P is None:
+            self.pending = [(px, py) for px, py in self.pending if not (np.array_equal(px, x) and py == y)]
+            return
+
+        Px = self.P @ x
+        denominator = 1 - x @ Px
+        error = y - x @ self.theta
+        gain = Px / denominator
+        self.theta = self.theta - gain * error
+        self.P = self.P + np.outer(gain, Px)
+        self.sse = max(self.sse - error ** 2 / denominator, 0.0)
+        self.weight -= 1
+
+    def standard_errors(self):
+        """Coefficient standard errors (NaN until there are more observations than coefficients)"""
+        if self.P is None or self.weight <= self.n_features:
+            return np.full(self.n_features, np.nan)
+        variance = self.sse / (self.weight - self.n_features)
+        return np.sqrt(np.maximum(np.diag(self.P), 0) * variance)
+
+    def estimates(self):
+        if self.theta is None:
+            return np.full(self.n_features, np.nan)
+        return self.theta.copy()
+
+
+def track_regression(X, y, valid=None, window=None, forgetting=1.0):
+    """
+    Coefficients and standard errors after each row of a regression
+
+    X: (n, k) regressors; y: (n,) responses; valid: rows to use (default all)
+    window: rolling window length in rows (None = expanding window)
+    Returns (n, k) estimates, (n, k) standard errors and (n,) effective sample sizes.
+    """
+    if window is not None and forgetting != 1.0:
+        raise ValueError("Use either a rolling window or a forgetting factor, not both")
+    n, k = X.shape
+    valid = np.ones(n, dtype=bool) if valid is None else valid
+    rls = RecursiveLeastSquares(k, forgetting)
+    in_window = deque()
+    estimates, errors, sizes = np.empty((n, k)), np.empty((n, k)), np.empty(n)
+    for i in range(n):
+        if valid[i]:
+            rls.update(X[i], y[i])
+            in_window.append(i)
+        if window is not None:
+            while in_window and in_window[0] <= i - window:
+                j = in_window.popleft()
+                rls.downdate(X[j], y[j])
+        estimates[i] = rls.estimates()
+        errors[i] = rls.standard_errors()
+        sizes[i] = rls.weight if rls.P is not None else len(rls.pending)
+    return estimates, errors, sizes
+
+
+def time_varying_parameters(df, window=15, forgetting=1.0, confidence=0.95):
+    """
+    σ, ρ, α and β through time from an EnhancedEmpiricalAnalysis data frame
+
+    df: needs the data columns and the dCO2_dt, dMaterials_dt, dGrowth_dt derivatives
+    window: rolling window in years (None = expanding window, optionally with forgetting)
+    Returns a data frame indexed by year with each parameter, its standard
+    error and the low/high confidence band (t-distribution on the effective
+    sample size).
+    """
+    co2 = df['co2_emissions_gt'].values
+    materials = df['material_use_gt'].values
+    growth = df['gdp_growth_percent'].values
+    mask1, mask2, mask3 = equation_masks(co2, materials, growth)
+    equations = {
+        'sigma': ((materials - co2)[:, None], df['dCO2_dt'].values, mask1),
+        'materials': (np.column_stack([co2, -co2 * growth, -materials]), df['dMaterials_dt'].values, mask2),
+        'growth': (np.column_stack([co2 * materials, -growth]), df['dGrowth_dt'].values, mask3),
+        'co2_mean': (np.ones((len(co2), 1)), co2, mask2),  # Window mean of CO2, for ρ = a / mean(CO2)
+    }
+    tracked = {name: track_regression(X, y, valid, window=window, forgetting=forgetting)
+               for name, (X, y, valid) in equations.items()}
+
+    co2_mean = tracked['co2_mean'][0][:, 0]
+    columns = {
+        'sigma': (tracked['sigma'][0][:, 0], tracked['sigma'][1][:, 0], tracked['sigma'][2], 1),
+        'rho': (tracked['materials'][0][:, 0] / co2_mean, tracked['materials'][1][:, 0] / co2_mean,
+                tracked['materials'][2], 3),
+        'alpha': (tracked['growth'][0][:, 0], tracked['growth'][1][:, 0], tracked['growth'][2], 2),
+        'beta': (tracked['growth'][0][:, 1], tracked['growth'][1][:, 1], tracked['growth'][2], 2),
+    }
+    result = pd.DataFrame(index=pd.Index(df['year'].values, name='year'))
+    for name, (estimate, error, size, k) in columns.items():
+        with np.errstate(invalid='ignore'):
+            quantile = stats.t.ppf(0.5 + confidence / 2, np.where(size > k, size - k, np.nan))
+        result[name] = estimate
+        result[f'{name}_se'] = error
+        result[f'{name}_low'] = estimate - quantile * error
+        result[f'{name}_high'] = estimate + quantile * error
+    result['n_effective'] = tracked['materials'][2]
+    return result
+
+
+def plot_time_varying_parameters(estimates, full_sample=None, title='Time-Varying Parameters'):
+    """Each parameter through time with its confidence band, against the full-sample estimate"""
+    symbols = {'sigma': 'σ', 'rho': 'ρ', 'alpha': 'α', 'beta': 'β'}
+    fig, axes = plt.subplots(2, 2, figsize=(14, 9), sharex=True)
+    years = estimates.index.values
+    for ax, (name, symbol) in zip(axes.flat, symbols.items()):
+        ax.fill_between(years, estimates[f'{name}_low'], estimates[f'{name}_high'], alpha=0.3)
+        ax.plot(years, estimates[name], linewidth=2, label='Recursive estimate')
+        if full_sample is not None:
+            ax.axhline(full_sample[name], color='red', linestyle='--', label='Full-sample fit')
+        ax.axhline(0, color='black', linewidth=0.5)
+        ax.set_title(symbol)
+        ax.grid(True)
+    axes[0, 0].legend()
+    for ax in axes[1]:
+        ax.set_xlabel('Year')
+    fig.suptitle(title)
+
+    plt.tight_layout()
+    plt.show()
+    return fig
+
+
+if __name__ == "__main__":
+    from enhanced_empirical_analysis import EnhancedEmpiricalAnalysis
+
+    analyzer = EnhancedEmpiricalAnalysis()
+    rolling = time_varying_parameters(analyzer.df, window=15)
+    expanding = time_varying_parameters(analyzer.df, window=None, forgetting=0.93)
+    print(rolling[['sigma', 'sigma_se', 'rho', 'alpha', 'beta']].iloc[::5].round(5))
+    plot_time_varying_parameters(rolling, title='15-Year Rolling Window')
+    plot_time_varying_parameters(expanding, title='Expanding Window, Forgetting Factor 0.93')
@@ -0,0 +1,162 @@
+"""
+Streaming gridded spatial maps of ABM adoption, emissions and wealth
+
+Every step, agent positions are binned onto a fixed (gx, gy) grid with one
+weighted np.bincount per quantity, and the result is written into a
+preallocated (year x gx x gy) cube. No raw agent snapshots are kept, and cubes
+from ensemble members can be averaged cell by cell.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+
+
+GRID_QUANTITIES = ('agents', 'adopters', 'emissions', 'wealth')
+
+
+class SpatialAdoptionGrid:
+    def __init__(self, n_steps, gx=40, gy=40, extent=(-90, 90, -90, 90)):
+        """
+        n_steps: number of steps (years) the cube holds
+        gx, gy: grid cells along x and y
+        extent: (xmin, xmax, ymin, ymax); agents outside are clipped to the edge cells
+        """
+        self.n_steps = n_steps
+        self.gx = gx
+        self.gy = gy
+        self.extent = extent
+        self.cubes = {name: np.zeros((n_steps, gx, gy), dtype=np.float32) for name in GRID_QUANTITIES}
+        self.years = np.zeros(n_steps, dtype=np.int16)
+        self.n_recorded = 0
+
+    def _flat_bins(self, x, y):
+        xmin, xmax, ymin, ymax = self.extent
+        ix = np.clip(((np.asarray(x) - xmin) / (xmax - xmin) * self.gx).astype(int), 0, self.gx - 1)
+        iy = np.clip(((np.asarray(y) - ymin) / (ymax - ymin) * self.gy).astype(int), 0, self.gy - 1)
+        return ix * self.gy + iy
+
+    def update(self, year, x, y, adopted, emissions, wealth):
+        """Bin one step of agent arrays into the next slice of the cube"""
+        if self.n_recorded >= self.n_steps:
+            raise IndexError("Spatial grid is full; create it with more steps")
+
+        bins = self._flat_bins(x, y)
+        n_cells = self.gx * self.gy
+        step = self.n_recorded
+        weights = {'agents': None, 'adopters': adopted, 'emissions': emissions, 'wealth': wealth}
+        for name, w in weights.items():
+            counts = np.bincount(bins, weights=w, minlength=n_cells)
+            self.cubes[name][step] = counts.reshape(self.gx, self.gy)
+
+        self.years[step] = year
+        self.n_recorded += 1
+
+    def update_from_model(self, model):
+        """Bin the current state of a ClimateModel"""
+        agents = model.agents
+        locations = np.array([agent.location for agent in agents], dtype=float).reshape(-1, 2)
+        self.update(
+            model.year,
+            locations[:, 0], locations[:, 1],
+            model.adoption_state().astype(float),
+            np.array([agent.annual_emissions for agent in agents], dtype=float),
+            np.array([agent.wealth for agent in agents], dtype=float)
+        )
+
+    def cube(self, name):
+        """
+        A recorded (n_recorded, gx, gy) cube
+
+        name is one of GRID_QUANTITIES, or 'adoption_share' (adopters / agents,
+        NaN in empty cells).
+        """
+        if name == 'adoption_share':
+            agents = self.cubes['agents'][:self.n_recorded]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(agents > 0, self.cubes['adopters'][:self.n_recorded] / agents, np.nan)
+        return self.cubes[name][:self.n_recorded]
+
+    def save(self, path):
+        """Save the recorded cubes to a compressed .npz file"""
+        np.savez_compressed(path, years=self.years[:self.n_recorded], extent=np.array(self.extent),
+                            **{name: self.cube(name) for name in GRID_QUANTITIES})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_steps, gx, gy = data['agents'].shape
+            grid = cls(n_steps, gx, gy, extent=tuple(data['extent']))
+            for name in GRID_QUANTITIES:
+                grid.cubes[name][:] = data[name]
+            grid.years[:] = data['years']
+            grid.n_recorded = n_steps
+        return grid
+
+    @classmethod
+    def aggregate(cls, grids):
+        """Cell-wise ensemble mean of grids with identical shape and extent"""
+        first = grids[0]
+        n_steps = min(grid.n_recorded for grid in grids)
+        mean = cls(n_steps, first.gx, first.gy, extent=first.extent)
+        for name in GRID_QUANTITIES:
+            mean.cubes[name][:] = np.mean([grid.cubes[name][:n_steps] for grid in grids], axis=0)
+        mean.years[:] = first.years[:n_steps]
+        mean.n_recorded = n_steps
+        return mean
+
+    def animate(self, name='adoption_share', interval=300, city_centers=None):
+        """Animate a cube over time; returns the FuncAnimation (keep a reference to it)"""
+        data = self.cube(name)
+        xmin, xmax, ymin, ymax = self.extent
+
+        fig, ax = plt.subplots(figsize=(7, 6))
+        vmax = np.nanmax(data) if np.any(np.isfinite(data)) else 1
+        image = ax.imshow(data[0].T, origin='lower', extent=self.extent, cmap='viridis', vmin=0, vmax=vmax)
+        fig.colorbar(image, ax=ax, label=name.replace('_', ' '))
+        if city_centers is not None:
+            ax.scatter(*zip(*city_centers), color='red', marker='x', s=60, label='City centres')
+            ax.legend(loc='upper right')
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        title = ax.set_title('')
+
+        def frame(i):
+            image.set_data(data[i].T)
+            title.set_text(f'{name.replace("_", " ").capitalize()} - {self.years[i]}')
+            return image, title
+
+        frame(0)
+        return FuncAnimation(fig, frame, frames=len(data), interval=interval, blit=False)
+
+
+if __name__ == "__main__":
+    from enhanced_climate_abm import ClimateModel
+
+    years = 30
+    n_members = 4
+    city_centers = [(30, 30), (-30, 30), (0, -30)]
+    grids = []
+
+    for member in range(n_members):
+        np.random.seed(member)
+        model = ClimateModel(n_households=1000, n_firms=100)
+        grid = SpatialAdoptionGrid(years, gx=36, gy=36)
+        for year in range(years):
+            model.step(100 * 0.95 ** year, 80)
+            grid.update_from_model(model)
+        grids.append(grid)
+
+    ensemble = SpatialAdoptionGrid.aggregate(grids)
+    ensemble.save('spatial_adoption_cube.npz')
+
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+    for ax, i in zip(axes, (0, years // 2, years - 1)):
+        image = ax.imshow(ensemble.cube('adoption_share')[i].T, origin='lower', extent=ensemble.extent,
+                          cmap='viridis', vmin=0, vmax=1)
+        ax.set_title(f'Ensemble-mean Adoption Share - {ensemble.years[i]}')
+    fig.colorbar(image, ax=axes, label='Adoption share')
+    plt.show()
+
+    animation = ensemble.animate(city_centers=city_centers)
+    plt.show()
@@ -0,0 +1,214 @@
+"""
+Multi-technology adoption state for ClimateModel agents
+
+Agents can hold several technologies (rooftop solar, heat pumps, EVs, green
+tariffs, ...), each with its own Wright's-law cost curve (via
+learning_curves.LearningCurveEngine) and its own emission cut. Adoption state
+is one uint8 of bit flags per agent, and every technology decision for every
+agent is evaluated in a single vectorised (agents x technologies) pass per
+step, using the same decision rule as Agent.adoption_probability, including
+its full additive carbon price on the fossil alternative. Neighbour influence
+is read from last year's flags, so the pass is synchronous and a model using a
+portfolio must be built with update_mode='synchronous'.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from learning_curves import LearningCurveEngine, TechnologyConfig
+
+
+@dataclass
+class HouseholdTechnology:
+    """An adoptable technology and the fossil alternative it replaces"""
+    name: str
+    cost: float             # Upfront cost at the start (same units as renewable_cost)
+    fossil_cost: float      # Cost of the fossil alternative before carbon pricing
+    emission_cut: float     # Fractional cut in the agent's emissions once adopted
+    learning_rate: float    # Cost reduction per doubling of adopters
+    floor_fraction: float = 0.3  # Floor cost as a fraction of the starting cost
+
+
+DEFAULT_HOUSEHOLD_TECHNOLOGIES = [
+    HouseholdTechnology('rooftop_solar', cost=100, fossil_cost=80, emission_cut=0.35, learning_rate=0.20),
+    HouseholdTechnology('heat_pump', cost=120, fossil_cost=90, emission_cut=0.30, learning_rate=0.10),
+    HouseholdTechnology('electric_vehicle', cost=150, fossil_cost=120, emission_cut=0.25, learning_rate=0.15),
+    HouseholdTechnology('green_tariff', cost=20, fossil_cost=18, emission_cut=0.20, learning_rate=0.02,
+                        floor_fraction=0.8),
+]
+
+
+class TechnologyPortfolio:
+    def __init__(self, wealth, awareness, latitude, neighbor_index, base_emissions,
+                 technologies=DEFAULT_HOUSEHOLD_TECHNOLOGIES, initial_share=0.02):
+        """
+        wealth, awareness, latitude, base_emissions: (n_agents,) agent attributes
+        neighbor_index: (n_agents, k) neighbour positions, as ClimateModel.neighbor_index
+        initial_share: existing stock of each technology, as a share of agents, that
+                       anchors the learning curves
+        """
+        if len(technologies) > 8:
+            raise ValueError("At most 8 technologies fit in the uint8 adoption flags")
+
+        self.technologies = list(technologies)
+        self.names = [tech.name for tech in self.technologies]
+        self.wealth = np.asarray(wealth, dtype=float)
+        self.awareness = np.asarray(awareness, dtype=float)
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.neighbor_index = np.asarray(neighbor_index)
+        self.base_emissions = np.asarray(base_emissions, dtype=float)
+        n_agents = len(self.wealth)
+
+        self.flags = np.zeros(n_agents, dtype=np.uint8)
+        self.bits = (1 << np.arange(len(self.technologies))).astype(np.uint8)
+        self.fossil_costs = np.array([tech.fossil_cost for tech in self.technologies], dtype=float)
+        self.emission_cuts = np.array([tech.emission_cut for tech in self.technologies], dtype=float)
+
+        initial_units = max(1.0, initial_share * n_agents)
+        self.cost_engine = LearningCurveEngine([
+            TechnologyConfig(tech.name, learning_rate=tech.learning_rate,
+                             floor_cost=tech.floor_fraction * tech.cost, initial_deployment=initial_units,
+                             full_adoption_deployment=initial_units + n_agents, share=1.0,
+                             initial_cost=tech.cost)
+            for tech in self.technologies
+        ])
+
+    @classmethod
+    def from_model(cls, model, technologies=DEFAULT_HOUSEHOLD_TECHNOLOGIES, **kwargs):
+        """Build a portfolio over the agents of a ClimateModel"""
+        agents = model.agents
+        return cls(
+            wealth=[a.wealth for a in agents],
+            awareness=[a.environmental_awareness for a in agents],
+            latitude=[a.location[1] for a in agents],
+            neighbor_index=model.neighbor_index,
+            base_emissions=[a.annual_emissions for a in agents],
+            technologies=technologies,
+            **kwargs
+        )
+
+    def adopted(self):
+        """(n_agents, n_technologies) boolean view of the packed flags"""
+        return (self.flags[:, None] & self.bits[None, :]) != 0
+
+    def emission_factors(self, flags=None):
+        """Per-agent emission multiplier: product of (1 - cut) over adopted technologies"""
+        flags = self.flags if flags is None else flags
+        adopted = (flags[:, None] & self.bits[None, :]) != 0
+        return np.prod(np.where(adopted, 1 - self.emission_cuts, 1.0), axis=1)
+
+    def decide(self, global_temperature, carbon_price, policy_incentive, social_weight=0.3,
+               adoption_scale=0.1, rng=np.random):
+        """
+        One vectorised decision pass over all agents and technologies
+
+        Returns the new flags array; self.flags is not modified.
+        """
+        adopted = self.adopted()
+        costs = self.cost_engine.costs()[0]
+
+        # Each fossil alternative pays the full carbon price, as fossil_cost does in ClimateModel.step
+        fossil_alternative = self.fossil_costs + carbon_price
+        economic = (fossil_alternative - costs + policy_incentive) / fossil_alternative
+
+        if self.neighbor_index.shape[1]:
+            social = social_weight * adopted[self.neighbor_index].mean(axis=1)
+        else:
+            social = np.zeros(adopted.shape)
+
+        local_temp_impact = global_temperature * (1 + 0.2 * np.abs(self.latitude) / 90)
+        environmental = self.awareness * local_temp_impact
+
+        probability = adoption_scale * (economic[None, :] + social + environmental[:, None])
+
+        # Wealth constraint with financing option, as in Agent.adoption_probability
+        constrained = (self.wealth[:, None] < costs[None, :]) & (self.wealth[:, None] < costs[None, :] / 5)
+        probability = np.where(constrained, 0.1 * probability, probability)
+        probability = np.clip(probability, 0, 1)
+        probability[adopted] = 0
+
+        new = rng.random(adopted.shape) < probability
+        return self.flags | np.bitwise_or.reduce(np.where(new, self.bits, 0).astype(np.uint8), axis=1)
+
+    def step(self, model, policy_incentive):
+        """
+        Advance the portfolio one year and push changes onto the model's agents
+
+        Returns the positions of agents that adopted their first technology.
+        """
+        previous = self.flags
+        self.flags = self.decide(model.temperature, model.carbon_price, policy_incentive,
+                                 model.social_influence, model.adoption_scale)
+
+        # Cost curves learn from this year's adopters of each technology
+        gained = ((self.flags & ~previous)[:, None] & self.bits[None, :]) != 0
+        self.cost_engine.deploy(gained.sum(axis=0))
+
+        # Only agents whose flags changed need their objects touched
+        changed = np.flatnonzero(self.flags != previous)
+        factors = self.emission_factors(self.flags[changed])
+        for i, factor in zip(changed, factors):
+            agent = model.agents[i]
+            agent.technology_flags = int(self.flags[i])
+            agent.has_renewables = True
+            agent.annual_emissions = self.base_emissions[i] * factor
+
+        return changed[previous[changed] == 0]
+
+    def sync_agents(self, model, moved):
+        """Follow migration: refresh moved agents' latitudes and append any new agents"""
+        n_new = len(model.agents) - len(self.flags)
+        if n_new > 0:
+            entrants = model.agents[-n_new:]
+            self.wealth = np.concatenate([self.wealth, [a.wealth for a in entrants]])
+            self.awareness = np.concatenate([self.awareness, [a.environmental_awareness for a in entrants]])
+            self.latitude = np.concatenate([self.latitude, [a.location[1] for a in entrants]])
+            self.base_emissions = np.concatenate([self.base_emissions, [a.annual_emissions for a in entrants]])
+            self.flags = np.concatenate([self.flags, np.zeros(n_new, dtype=np.uint8)])
+
+        self.latitude[moved] = [model.agents[i].location[1] for i in moved]
+        self.neighbor_index = model.neighbor_index
+
+    def adoption_shares(self):
+        """Share of agents holding each technology"""
+        return dict(zip(self.names, self.adopted().mean(axis=0)))
+
+
+if __name__ == "__main__":
+    from enhanced_climate_abm import ClimateModel
+
+    np.random.seed(0)
+    model = ClimateModel(n_households=1000, n_firms=100, update_mode='synchronous')
+    model.technologies = TechnologyPortfolio.from_model(model)
+
+    years = 30
+    shares, costs, emissions = [], [], []
+    for year in range(years):
+        results = model.step(100, 80)
+        shares.append(list(model.technologies.adoption_shares().values()))
+        costs.append(model.technologies.cost_engine.costs()[0])
+        emissions.append(results[3])
+
+    shares, costs = np.array(shares), np.array(costs)
+    years_list = np.arange(2025, 2025 + years)
+
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
+    for t, name in enumerate(model.technologies.names):
+        ax1.plot(years_list, shares[:, t], label=name)
+        ax2.plot(years_list, costs[:, t], label=name)
+    ax1.set_ylabel('Adoption share')
+    ax1.set_title('Technology Adoption')
+    ax1.legend()
+    ax2.set_ylabel('Cost')
+    ax2.set_title('Technology Cost Curves')
+    ax2.legend()
+    ax3.plot(years_list, emissions)
+    ax3.set_ylabel('Annual Emissions (tonnes CO2)')
+    ax3.set_title('Emissions Trajectory')
+    for ax in (ax1, ax2, ax3):
+        ax.set_xlabel('Year')
+
+    plt.tight_layout()
+    plt.show()
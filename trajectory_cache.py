@@ -0,0 +1,159 @@
+"""
+Memoising cache for attractor trajectories
+
+generate_trajectory results are keyed by the model class, its numeric
+parameters (sigma, rho, beta and the scales), the initial state, t_span,
+n_points and the integration method. Lookups go through two tiers:
+
+- an in-memory LRU of the most recent trajectories, and
+- an optional on-disk tier of .npz files that survives between scripts and
+  sessions, evicting least-recently-used files once it exceeds a size budget.
+
+Pass a TrajectoryCache as cache= to generate_trajectory (or
+experiment_with_parameters). Cached arrays are returned read-only, on the
+integrating call as well as on hits, and each call gets its own copy of the
+solver statistics dict.
+"""
+
+import hashlib
+import json
+import numbers
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TrajectoryCache:
+    def __init__(self, max_memory_items=64, cache_dir=None, max_disk_bytes=500 * 1024 ** 2):
+        """
+        max_memory_items: trajectories kept in the in-memory LRU tier
+        cache_dir: directory for the on-disk tier (None = memory only)
+        max_disk_bytes: size budget of the disk tier
+        """
+        self.max_memory_items = max_memory_items
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(system, initial_state, t_span, n_points, method='odeint'):
+        """Hash of everything that determines a trajectory"""
+        # numbers.Real also covers NumPy scalars such as np.float32 and np.int64
+        params = {name: float(value) for name, value in sorted(vars(system).items())
+                  if isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_))}
+        description = {
+            'model': f'{type(system).__module__}.{type(system).__qualname__}',
+            'params': params,
+            'initial_state': [float(v) for v in initial_state],
+            't_span': float(t_span),
+            'n_points': int(n_points),
+            'method': method,
+        }
+        if hasattr(system, 'signature'):
+            # Declared models share a class, so their equations must be part of the key
+            description['equations'] = system.signature()
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.npz')
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """(trajectory, t, solve_stats) for a key, or None on a miss"""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return self._hand_out(self.memory[key])
+
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            path = self._path(key)
+            with np.load(path) as data:
+                entry = self._freeze(data['trajectory'], data['t'], json.loads(str(data['stats'])))
+            os.utime(path)  # Mark as recently used for eviction
+            self._remember(key, entry)
+            self.stats['disk_hits'] += 1
+            return self._hand_out(entry)
+
+        self.stats['misses'] += 1
+        return None
+
+    @staticmethod
+    def _freeze(trajectory, t, stats):
+        trajectory, t = np.array(trajectory), np.array(t)
+        trajectory.flags.writeable = False
+        t.flags.writeable = False
+        return trajectory, t, None if stats is None else dict(stats)
+
+    @staticmethod
+    def _hand_out(entry):
+        # The arrays are read-only and can be shared; the stats dict is not
+        trajectory, t, stats = entry
+        return trajectory, t, None if stats is None else dict(stats)
+
+    def put(self, key, trajectory, t, stats=None):
+        """Store a trajectory; returns the read-only (trajectory, t, solve_stats) callers should use"""
+        entry = self._freeze(trajectory, t, stats)
+        self._remember(key, entry)
+        if self.cache_dir is not None:
+            # Write then rename, so a concurrent reader never sees a partial file
+            temporary = self._path(key) + '.tmp.npz'
+            np.savez(temporary, trajectory=entry[0], t=entry[1], stats=json.dumps(stats))
+            os.replace(temporary, self._path(key))
+            self._evict()
+        return self._hand_out(entry)
+
+    def _evict(self):
+        """Delete least-recently-used files until the disk tier fits its budget"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz') and '.tmp' not in name:
+                path = os.path.join(self.cache_dir, name)
+                info = os.stat(path)
+                files.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def disk_usage(self):
+        if self.cache_dir is None:
+            return 0
+        return sum(os.path.getsize(os.path.join(self.cache_dir, name))
+                   for name in os.listdir(self.cache_dir) if name.endswith('.npz'))
+
+    def clear(self, disk=True):
+        self.memory.clear()
+        if disk and self.cache_dir is not None:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+if __name__ == "__main__":
+    import time
+    from empirical_civilization_attractor import EmpiricalCivilizationAttractor
+
+    cache = TrajectoryCache(cache_dir='.trajectory_cache', max_disk_bytes=50 * 1024 ** 2)
+    system = EmpiricalCivilizationAttractor()
+
+    for attempt in ('first call', 'repeat call'):
+        start = time.perf_counter()
+        system.generate_trajectory(t_span=50, n_points=5000, cache=cache)
+        print(f"{attempt}: {1000 * (time.perf_counter() - start):.2f} ms")
+
+    cache.memory.clear()  # Simulate a new session: only the disk tier remains
+    start = time.perf_counter()
+    system.generate_trajectory(t_span=50, n_points=5000, cache=cache)
+    print(f"from disk: {1000 * (time.perf_counter() - start):.2f} ms")
+    print(f"Cache stats: {cache.stats}, disk usage {cache.disk_usage() / 1024:.0f} KiB")
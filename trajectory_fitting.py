@@ -0,0 +1,242 @@
+"""
+Full-trajectory parameter fitting against the 1970-2024 historical dataset
+
+analyze_lorenz_relationships estimates each equation separately from
+finite-difference derivatives. Here the whole system
+
+    dCO2/dt       = σ(Materials - CO2)
+    dMaterials/dt = CO2(ρ - Growth) - Materials
+    dGrowth/dt    = α CO2 Materials - β Growth
+
+is integrated from the observed 1970 state and (σ, ρ, α, β) are chosen to
+minimise the weighted squared error between the simulated and observed
+trajectories, so the parameters actually reproduce the historical path.
+
+Gradients come from forward sensitivities: the ODE is augmented with
+dS/dt = J S + ∂f/∂p for the 3x4 sensitivity matrix S = ∂state/∂params, so
+one integration gives both the loss and its exact gradient. L-BFGS-B then
+needs only a few dozen integrations per start. Parameters are optimised in
+log space (α and σ differ by orders of magnitude), and many random starts
+are run in parallel processes since the loss surface has several basins.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from scipy.integrate import solve_ivp
+from scipy.optimize import minimize
+
+
+PARAMETER_NAMES = ('sigma', 'rho', 'alpha', 'beta')
+VARIABLES = ('co2_emissions_gt', 'material_use_gt', 'gdp_growth_percent')
+
+# Search bounds (low, high); starts are drawn log-uniformly inside them
+DEFAULT_BOUNDS = {
+    'sigma': (1e-3, 2.0),
+    'rho': (0.1, 20.0),
+    'alpha': (1e-7, 1e-2),
+    'beta': (1e-3, 5.0),
+}
+
+
+def _augmented_rhs(t, augmented, sigma, rho, alpha, beta):
+    """State and forward-sensitivity derivatives: dS/dt = J S + df/dp"""
+    x, y, z = augmented[:3]
+    S = augmented[3:].reshape(3, 4)
+    J = np.array([
+        [-sigma, sigma, 0.0],
+        [rho - z, -1.0, -x],
+        [alpha * y, alpha * x, -beta],
+    ])
+    # Columns: d f / d(sigma, rho, alpha, beta)
+    df_dp = np.array([
+        [y - x, 0.0, 0.0, 0.0],
+        [0.0, x, 0.0, 0.0],
+        [0.0, 0.0, x * y, -z],
+    ])
+    derivatives = [sigma * (y - x), x * (rho - z) - y, alpha * x * y - beta * z]
+    return np.concatenate([derivatives, (J @ S + df_dp).ravel()])
+
+
+def _rhs(t, state, sigma, rho, alpha, beta):
+    x, y, z = state
+    return [sigma * (y - x), x * (rho - z) - y, alpha * x * y - beta * z]
+
+
+def _fit_start(args):
+    """Worker: one L-BFGS-B run from a starting parameter vector"""
+    fitter, start = args
+    return fitter.fit_from(start)
+
+
+class TrajectoryFitter:
+    def __init__(self, years, observations, bounds=DEFAULT_BOUNDS, weights=None, rtol=1e-8, atol=1e-8,
+                 divergence_limit=100.0):
+        """
+        years: (n,) observation years; the first row is the initial state
+        observations: (n, 3) observed (CO2, materials, growth)
+        bounds: dict of (low, high) for each name in PARAMETER_NAMES
+        weights: per-variable weights on squared errors (default: 1 / variance of each series)
+        divergence_limit: trajectories beyond this many times the observed range are abandoned
+        """
+        self.years = np.asarray(years, dtype=float)
+        self.observations = np.asarray(observations, dtype=float)
+        self.t_eval = self.years - self.years[0]
+        self.initial_state = self.observations[0]
+        self.bounds = bounds
+        self.log_bounds = [(np.log(bounds[name][0]), np.log(bounds[name][1])) for name in PARAMETER_NAMES]
+        if weights is None:
+            weights = 1.0 / np.var(self.observations, axis=0)
+        self.weights = np.asarray(weights, dtype=float)
+        self.rtol = rtol
+        self.atol = atol
+        self.limit = divergence_limit * np.max(np.abs(self.observations), axis=0)
+
+    @classmethod
+    def from_data_file(cls, data_file="data/civilization_dynamics_1970_2024.csv", **kwargs):
+        df = pd.read_csv(data_file).sort_values('year')
+        return cls(df['year'].values, df[list(VARIABLES)].values, **kwargs)
+
+    def _diverged(self, t, state, *params):
+        return np.min(self.limit - np.abs(state[:3]))
+    _diverged.terminal = True
+
+    def simulate(self, params, sensitivities=False):
+        """
+        Integrate from the observed initial state at the observation years
+
+        params: (sigma, rho, alpha, beta)
+        Returns the (n, 3) trajectory, plus the (n, 3, 4) sensitivities if
+        requested, or None if the trajectory diverged or the solver failed.
+        """
+        if sensitivities:
+            rhs, y0 = _augmented_rhs, np.concatenate([self.initial_state, np.zeros(12)])
+        else:
+            rhs, y0 = _rhs, self.initial_state
+        with np.errstate(over='ignore', invalid='ignore'):
+            solution = solve_ivp(rhs, (0, self.t_eval[-1]), y0, method='LSODA', t_eval=self.t_eval,
+                                 args=tuple(params), events=self._diverged, rtol=self.rtol, atol=self.atol)
+        if solution.status != 0 or solution.y.shape[1] != len(self.t_eval) or not np.all(np.isfinite(solution.y)):
+            return None
+
+        trajectory = solution.y[:3].T
+        if sensitivities:
+            return trajectory, solution.y[3:].T.reshape(-1, 3, 4)
+        return trajectory
+
+    def loss(self, params):
+        """Weighted mean squared trajectory error (inf if the trajectory diverges)"""
+        trajectory = self.simulate(params)
+        if trajectory is None:
+            return np.inf
+        return 0.5 * np.mean(np.sum(self.weights * (trajectory - self.observations) ** 2, axis=1))
+
+    def loss_and_gradient(self, log_params):
+        """Loss and its gradient with respect to log-parameters, from one augmented integration"""
+        params = np.exp(log_params)
+        result = self.simulate(params, sensitivities=True)
+        if result is None:
+            # Large finite penalty so the line search backs off
+            return 1e10, np.zeros(len(params))
+        trajectory, S = result
+        residuals = self.weights * (trajectory - self.observations)
+        n = len(self.observations)
+        value = 0.5 * np.sum(residuals * (trajectory - self.observations)) / n
+        gradient = np.einsum('ni,nip->p', residuals, S) / n
+        return value, gradient * params  # Chain rule for log-parameters
+
+    def fit_from(self, start, max_iterations=200):
+        """Run L-BFGS-B from one starting parameter vector (sigma, rho, alpha, beta)"""
+        low, high = np.exp(np.array(self.log_bounds).T)
+        start = np.log(np.clip(start, low, high))
+        result = minimize(self.loss_and_gradient, start, jac=True, method='L-BFGS-B', bounds=self.log_bounds,
+                          options={'maxiter': max_iterations})
+        return {
+            'params': dict(zip(PARAMETER_NAMES, np.exp(result.x))),
+            'loss': float(result.fun),
+            'start': dict(zip(PARAMETER_NAMES, np.exp(start))),
+            'n_integrations': int(result.nfev),
+            'success': bool(result.success) and result.fun < 1e10,
+        }
+
+    def sample_starts(self, n_starts, seed=None):
+        """Starting vectors drawn log-uniformly within the bounds"""
+        rng = np.random.default_rng(seed)
+        low, high = np.array(self.log_bounds).T
+        return np.exp(rng.uniform(low, high, size=(n_starts, len(PARAMETER_NAMES))))
+
+    def fit(self, n_starts=32, initial_guesses=(), n_workers=None, seed=None, verbose=True):
+        """
+        Multi-start fit; random starts are optimised in parallel processes
+
+        initial_guesses: extra starting dicts (e.g. the algebraic estimates)
+        Returns the best start's result dict, with all runs under 'runs'
+        sorted by loss.
+        """
+        starts = [np.array([guess[name] for name in PARAMETER_NAMES], dtype=float) for guess in initial_guesses]
+        starts += list(self.sample_starts(n_starts, seed))
+
+        started = time.perf_counter()
+        tasks = [(self, start) for start in starts]
+        if n_workers == 1:
+            runs = [_fit_start(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                runs = list(executor.map(_fit_start, tasks))
+        runs.sort(key=lambda run: run['loss'])
+
+        best = dict(runs[0])
+        best['runs'] = runs
+        best['trajectory'] = self.simulate([best['params'][name] for name in PARAMETER_NAMES])
+        best['r2'] = self.r_squared(best['trajectory'])
+        if verbose:
+            converged = sum(run['success'] for run in runs)
+            integrations = sum(run['n_integrations'] for run in runs)
+            print(f"{len(runs)} starts ({converged} converged) in {time.perf_counter() - started:.1f} s, "
+                  f"{integrations / len(runs):.0f} integrations per start on average")
+            print("Best fit: " + ", ".join(f"{name} = {value:.4g}" for name, value in best['params'].items())
+                  + f" (loss {best['loss']:.4f})")
+        return best
+
+    def r_squared(self, trajectory):
+        """R² of a simulated trajectory against each observed series"""
+        if trajectory is None:
+            return dict.fromkeys(VARIABLES, np.nan)
+        residual = np.sum((self.observations - trajectory) ** 2, axis=0)
+        total = np.sum((self.observations - self.observations.mean(axis=0)) ** 2, axis=0)
+        return dict(zip(VARIABLES, 1 - residual / total))
+
+
+def plot_trajectory_fit(fitter, fits, labels):
+    """Observed series against the simulated trajectories of one or more fitted parameter sets"""
+    titles = ('CO2 Emissions (GT/yr)', 'Material Use (GT/yr)', 'GDP Growth (%/yr)')
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+    for i, ax in enumerate(axes):
+        ax.plot(fitter.years, fitter.observations[:, i], 'ko', markersize=3, label='Observed')
+        for params, label in zip(fits, labels):
+            trajectory = fitter.simulate([params[name] for name in PARAMETER_NAMES])
+            if trajectory is not None:
+                ax.plot(fitter.years, trajectory[:, i], linewidth=2, label=label)
+        ax.set_title(titles[i])
+        ax.set_xlabel('Year')
+        ax.grid(True)
+    axes[0].legend()
+
+    plt.tight_layout()
+    plt.show()
+    return fig
+
+
+if __name__ == "__main__":
+    fitter = TrajectoryFitter.from_data_file()
+
+    # The hand-tuned values of EmpiricalCivilizationAttractor as an extra start
+    hand_tuned = {'sigma': 0.021, 'rho': 4.75, 'alpha': 1e-4, 'beta': 0.7}
+    print(f"Hand-tuned loss: {fitter.loss([hand_tuned[name] for name in PARAMETER_NAMES]):.4f}")
+
+    best = fitter.fit(n_starts=32, initial_guesses=[hand_tuned], seed=0)
+    print("Trajectory R²: " + ", ".join(f"{name} {value:.3f}" for name, value in best['r2'].items()))
+    plot_trajectory_fit(fitter, [hand_tuned, best['params']], ['Hand-tuned', 'Trajectory fit'])
@@ -0,0 +1,159 @@
+"""
+Level-of-detail rendering for long attractor trajectories
+
+A colour-graded 3-D trajectory drawn one segment per ax.plot call creates one
+artist per segment, which makes drawing and every rotation slow. Here the
+whole gradient line is a single Line3DCollection, and trajectories longer
+than a point budget are first thinned with a shape-preserving downsampler:
+
+- LTTB (largest-triangle-three-buckets), extended to n dimensions, keeps in
+  each time bucket the point that spans the largest triangle with its
+  neighbours, and
+- curvature decimation keeps the points where the path turns most sharply.
+
+Both always keep the first and last points.
+"""
+
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+
+def _normalise(points):
+    """Scale each column to unit range so no variable dominates the geometry"""
+    span = np.ptp(points, axis=0)
+    return (points - points.min(axis=0)) / np.where(span > 0, span, 1)
+
+
+def lttb_downsample(points, n_out, t=None):
+    """
+    Indices of n_out points chosen by largest-triangle-three-buckets
+
+    points: (n, d) array; t: (n,) sample times used as an extra coordinate
+    (default: the sample index)
+    """
+    n = len(points)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    t = np.arange(n, dtype=float) if t is None else np.asarray(t, dtype=float)
+    data = _normalise(np.column_stack([t, points]))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)  # n_out - 2 buckets between the endpoints
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = data[0]
+    for b in range(n_out - 2):
+        start, stop = edges[b], max(edges[b + 1], edges[b] + 1)
+        # Next bucket's centroid (the last point for the final bucket)
+        following = data[stop:max(edges[b + 2], stop + 1)].mean(axis=0) if b + 2 < len(edges) else data[-1]
+
+        candidates = data[start:stop]
+        a = candidates - previous
+        c = following - previous
+        # Triangle area in d dimensions: 0.5 * sqrt(|a|^2 |c|^2 - (a.c)^2)
+        areas = np.sum(a ** 2, axis=1) * (c @ c) - (a @ c) ** 2
+        best = start + int(np.argmax(areas))
+        selected[b + 1] = best
+        previous = data[best]
+    return selected
+
+
+def curvature_downsample(points, n_out):
+    """Indices of the n_out points with the sharpest turning, plus the endpoints"""
+    n = len(points)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    data = _normalise(points)
+    incoming = data[1:-1] - data[:-2]
+    outgoing = data[2:] - data[1:-1]
+    lengths = np.linalg.norm(incoming, axis=1) * np.linalg.norm(outgoing, axis=1)
+    cosine = np.sum(incoming * outgoing, axis=1) / np.where(lengths > 0, lengths, 1)
+    # Turning angle weighted by local segment length, so long bends beat jitter
+    score = np.arccos(np.clip(cosine, -1, 1)) * np.sqrt(lengths)
+
+    keep = np.argpartition(score, -(n_out - 2))[-(n_out - 2):] + 1
+    return np.concatenate([[0], np.sort(keep), [n - 1]])
+
+
+DOWNSAMPLERS = {
+    'lttb': lambda points, n_out, t: lttb_downsample(points, n_out, t),
+    'curvature': lambda points, n_out, t: curvature_downsample(points, n_out),
+}
+
+
+def gradient_line_3d(ax, trajectory, t=None, cmap='viridis', max_points=5000, method='lttb', **kwargs):
+    """
+    Draw a trajectory as one colour-graded Line3DCollection
+
+    max_points: point budget; longer trajectories are downsampled with method
+                ('lttb' or 'curvature'); None disables downsampling
+    kwargs: passed to Line3DCollection (e.g. alpha, linewidth)
+    Returns the collection.
+    """
+    trajectory = np.asarray(trajectory, dtype=float)
+    t = np.arange(len(trajectory), dtype=float) if t is None else np.asarray(t, dtype=float)
+    if max_points is not None and len(trajectory) > max_points:
+        keep = DOWNSAMPLERS[method](trajectory, max_points, t)
+        trajectory, t = trajectory[keep], t[keep]
+
+    segments = np.stack([trajectory[:-1], trajectory[1:]], axis=1)
+    colors = plt.get_cmap(cmap)((t[:-1] - t[0]) / max(t[-1] - t[0], 1e-300))
+    collection = Line3DCollection(segments, colors=colors, **kwargs)
+    ax.add_collection3d(collection)
+    ax.auto_scale_xyz(trajectory[:, 0], trajectory[:, 1], trajectory[:, 2], had_data=ax.has_data())
+    return collection
+
+
+def _time_redraws(draw, n_views=3):
+    """Mean time to redraw a figure from a new viewpoint, as happens on every rotation"""
+    fig = plt.figure(figsize=(6, 6))
+    ax = fig.add_subplot(111, projection='3d')
+    draw(ax)
+    fig.canvas.draw()
+    start = time.perf_counter()
+    for azimuth in np.linspace(0, 60, n_views):
+        ax.view_init(elev=30, azim=azimuth)
+        fig.canvas.draw()
+    plt.close(fig)
+    return (time.perf_counter() - start) / n_views
+
+
+if __name__ == "__main__":
+    from transition_attractor import RealisticTransitionAttractor
+
+    # A long chaotic trajectory: 50k points
+    system = RealisticTransitionAttractor(sigma=10.0, rho=28.0, beta=8 / 3)
+    trajectory, t = system.generate_trajectory(t_span=100, n_points=50_000)
+
+    def per_segment(ax, points=trajectory[:5000]):
+        colors = plt.cm.viridis(np.linspace(0, 1, len(points)))
+        for i in range(len(points) - 1):
+            ax.plot(*points[i:i + 2].T, color=colors[i], linewidth=0.5)
+
+    variants = [
+        ('One ax.plot per segment (first 5k points)', per_segment),
+        ('Single collection, all 50k points', lambda ax: gradient_line_3d(ax, trajectory, t, max_points=None)),
+        ('Single collection, LTTB to 5k', lambda ax: gradient_line_3d(ax, trajectory, t, max_points=5000)),
+        ('Single collection, curvature to 5k',
+         lambda ax: gradient_line_3d(ax, trajectory, t, max_points=5000, method='curvature')),
+    ]
+    for label, draw in variants:
+        print(f"{label}: {1000 * _time_redraws(draw):.0f} ms per redraw")
+
+    fig = plt.figure(figsize=(18, 6))
+    for i, (label, method, budget) in enumerate([('All 50k points', 'lttb', None),
+                                                 ('LTTB to 5k points', 'lttb', 5000),
+                                                 ('Curvature to 5k points', 'curvature', 5000)]):
+        ax = fig.add_subplot(1, 3, i + 1, projection='3d')
+        gradient_line_3d(ax, trajectory, t, max_points=budget, method=method, linewidth=0.5, alpha=0.8)
+        ax.set_title(label)
+        ax.set_xlabel('CO2e Emissions (GT/yr)')
+        ax.set_ylabel('Material Use (GT/yr)')
+        ax.set_zlabel('Growth (%/yr)')
+
+    plt.tight_layout()
+    plt.show()
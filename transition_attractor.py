@@ -1,8 +1,9 @@
 import numpy as np
-from scipy.integrate import odeint
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 
+from ode_integration import integrate_odeint, integrate_solve_ivp
+
 
 class RealisticTransitionAttractor:
     def __init__(self, sigma=1.0, rho=4.0, beta=0.7):
@@ -15,6 +16,9 @@ class RealisticTransitionAttractor:
         self.materials_scale = 106.0  # GT/year
         self.growth_scale = 2.5  # %/year
 
+        # Solver statistics from the last generate_trajectory/solve call
+        self.solve_stats = None
+
     def system_eqs(self, state, t):
         """Define the system of equations with realistic scaling"""
         x, y, z = state  # x: emissions, y: material use, z: growth
@@ -36,8 +40,53 @@ class RealisticTransitionAttractor:
 
         return [dx, dy, dz]
 
-    def generate_trajectory(self, initial_state=None, t_span=50, n_points=5000):
-        """Generate a trajectory through the phase space"""
+    def jacobian(self, state, t):
+        """Analytic Jacobian of system_eqs in real units"""
+        return self.ensemble_jacobian(np.asarray(state, dtype=float)[None, :], t,
+                                      self.sigma, self.rho, self.beta)[0]
+
+    def ensemble_jacobian(self, states, t, sigma, rho, beta):
+        """Batched jacobian: (n_members, 3, 3) for (n_members, 3) states"""
+        sx, sy, sz = self.emissions_scale, self.materials_scale, self.growth_scale
+        x_norm = states[:, 0] / sx
+        y_norm = states[:, 1] / sy
+        z_norm = states[:, 2] / sz
+
+        # d(f_i * s_i)/d(x_j) = s_i * df_i/d(x_norm_j) / s_j
+        J = np.zeros((len(states), 3, 3))
+        J[:, 0, 0] = -sigma
+        J[:, 0, 1] = sigma * sx / sy
+        J[:, 1, 0] = (rho - z_norm) * sy / sx
+        J[:, 1, 1] = -1.0
+        J[:, 1, 2] = -x_norm * sy / sz
+        J[:, 2, 0] = y_norm * sz / sx
+        J[:, 2, 1] = x_norm * sz / sy
+        J[:, 2, 2] = -beta
+        return J
+
+    def ensemble_system_eqs(self, states, t, sigma, rho, beta):
+        """
+        Batched system_eqs for many members at once (see attractor_ensemble.py)
+
+        states: (n_members, 3) array; sigma, rho, beta: scalars or (n_members,) arrays
+        """
+        x_norm = states[:, 0] / self.emissions_scale
+        y_norm = states[:, 1] / self.materials_scale
+        z_norm = states[:, 2] / self.growth_scale
+
+        return np.column_stack([
+            sigma * (y_norm - x_norm) * self.emissions_scale,
+            (x_norm * (rho - z_norm) - y_norm) * self.materials_scale,
+            (x_norm * y_norm - beta * z_norm) * self.growth_scale
+        ])
+
+    def generate_trajectory(self, initial_state=None, t_span=50, n_points=5000, method='odeint', cache=None):
+        """
+        Generate a trajectory through the phase space
+
+        method: 'odeint' or a solve_ivp method (see ode_integration.SOLVER_METHODS)
+        cache: optional trajectory_cache.TrajectoryCache consulted before integrating
+        """
         if initial_state is None:
             initial_state = [
                 50.0,  # Current emissions GT CO2e/year
@@ -45,11 +94,32 @@ class RealisticTransitionAttractor:
                 2.5  # Current growth rate %/year
             ]
 
-        t = np.linspace(0, t_span, n_points)
-        trajectory = odeint(self.system_eqs, initial_state, t)
+        if cache is not None:
+            key = cache.key(self, initial_state, t_span, n_points, method)
+            cached = cache.get(key)
+            if cached is not None:
+                trajectory, t, self.solve_stats = cached
+                return trajectory, t
 
+        t = np.linspace(0, t_span, n_points)
+        if method == 'odeint':
+            trajectory, self.solve_stats = integrate_odeint(self, initial_state, t)
+        else:
+            solution = self.solve(initial_state, t_span, method)
+            trajectory = solution.sol(t).T
+
+        if cache is not None:
+            # Hand out the frozen entry, so a miss behaves like every later hit
+            trajectory, t, _ = cache.put(key, trajectory, t, self.solve_stats)
         return trajectory, t
 
+    def solve(self, initial_state=None, t_span=50, method='LSODA', rtol=1e-6, atol=1e-9):
+        """Integrate with solve_ivp and dense output; returns the solve_ivp result"""
+        if initial_state is None:
+            initial_state = [50.0, 106.0, 2.5]
+        solution, self.solve_stats = integrate_solve_ivp(self, initial_state, t_span, method, rtol, atol)
+        return solution
+
     def plot_attractor(self, trajectory, t):
         """Plot the attractor in 3D space with realistic units"""
         fig = plt.figure(figsize=(15, 10))
@@ -0,0 +1,70 @@
+"""
+Transition zones in attractor state space
+
+The single definition of the zone boxes drawn by
+future_pathways.PathwayVisualizer, with a vectorised lookup of the zone
+containing each (emissions, materials, growth) state. Used to classify where
+attractor trajectories end up or pass through.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Tuple, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class ZoneConfig:
+    """Configuration for a transition zone"""
+    name: str
+    color: str
+    growth_range: Tuple[float, float]
+    material_range: Tuple[float, float]
+    emission_range: Tuple[float, float]
+    text_position: Tuple[float, float, float]
+    surfaces: List = None
+    text_handle: Optional[object] = None
+
+    def __post_init__(self):
+        self.surfaces = [] if self.surfaces is None else self.surfaces
+
+
+TRANSITION_ZONES = [
+    ZoneConfig('Energy Transition Zone', 'green', growth_range=(2.5, 5), material_range=(0, 106),
+               emission_range=(-20, 50), text_position=(0, 50, 3.75)),
+    ZoneConfig('Intermediate Zone', 'orange', growth_range=(0, 2.5), material_range=(0, 106),
+               emission_range=(-20, 50), text_position=(0, 50, 1.25)),
+    ZoneConfig('Descent Zone', 'red', growth_range=(-5, 0), material_range=(0, 106),
+               emission_range=(-20, 50), text_position=(0, 50, -2.5)),
+    ZoneConfig('Future Materials Use', 'blue', growth_range=(-5, 5), material_range=(106, 160),
+               emission_range=(-20, 50), text_position=(0, 130, 0)),
+]
+
+OUTSIDE = -1
+
+
+def zone_configs(zones=TRANSITION_ZONES):
+    """Fresh copies of the zones keyed by name, for a plot to attach its own artists to"""
+    return {zone.name: replace(zone, surfaces=[], text_handle=None) for zone in zones}
+
+
+def zone_names(zones=TRANSITION_ZONES):
+    return [zone.name for zone in zones]
+
+
+def zone_index(states, zones=TRANSITION_ZONES):
+    """
+    Index into zones of the zone containing each state, OUTSIDE (-1) if none
+
+    states: (..., 3) array of (emissions, materials, growth). Ranges are
+    half-open [low, high); where zones touch, the earlier zone in the list wins.
+    """
+    states = np.asarray(states, dtype=float)
+    emissions, materials, growth = states[..., 0], states[..., 1], states[..., 2]
+    index = np.full(states.shape[:-1], OUTSIDE, dtype=int)
+    for i, zone in reversed(list(enumerate(zones))):
+        inside = ((zone.emission_range[0] <= emissions) & (emissions < zone.emission_range[1]) &
+                  (zone.material_range[0] <= materials) & (materials < zone.material_range[1]) &
+                  (zone.growth_range[0] <= growth) & (growth < zone.growth_range[1]))
+        index[inside] = i
+    return index